@@ -1,6 +1,8 @@
 import streamlit as st
 import time
 from typing import Dict, Any
+# mood_engine is the single mood source; detect_mood is re-exported for existing imports
+from mood_engine import detect_mood
 
 # === Mood to Color Mapping ===
 MOOD_COLORS = {
@@ -34,20 +36,6 @@ MOOD_COLORS = {
     }
 }
 
-# === Determine Mood from Text ===
-def detect_mood(text):
-    lowered = text.lower()
-    if any(word in lowered for word in ["sad", "tired", "lonely", "depressed", "cry", "blue"]):
-        return "sad"
-    elif any(word in lowered for word in ["angry", "annoyed", "pissed", "frustrated"]):
-        return "angry"
-    elif any(word in lowered for word in ["happy", "excited", "grateful", "glad", "joyful"]):
-        return "happy"
-    elif any(word in lowered for word in ["calm", "relaxed", "peaceful", "okay"]):
-        return "calm"
-    else:
-        return "neutral"
-
 # === Mood-Based Highlight Styling ===
 def set_mood_background(mood):
     """Set the background color based on the current mood."""
@@ -0,0 +1,64 @@
+# benchmarks/bench_doc_backend.py
+"""
+firebase_client helpers against the local SQLite backend (no network, no
+secrets), for CI timing of page-level read/write patterns.
+
+    python benchmarks/bench_doc_backend.py
+    python benchmarks/bench_doc_backend.py --users 500 --turns 50
+
+Runs on a scratch database; the doc cache is cleared before each read
+pass so reads hit the backend.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DOC_BACKEND"] = "sqlite"
+os.environ.setdefault("DOC_BACKEND_PATH", os.path.join(tempfile.mkdtemp(), "bench.sqlite"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from firebase_client import (  # noqa: E402
+    get_doc, get_docs, save_doc, save_docs, iter_docs, query_docs, doc_cache, flush_writes
+)
+
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed * 1000:9.1f} ms  {elapsed / count * 1e6:8.1f} µs/op")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark firebase_client on the SQLite backend")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+    users = [f"user{i:05d}" for i in range(args.users)]
+    clarity = {"traits": {t: {"score": 50, "xp": 0} for t in ("humor", "empathy", "ambition", "flirtiness")}}
+
+    timed("save_doc (settings)", lambda: [save_doc("settings", u, {"voice_id": "v", "dark_mode": False})
+                                          for u in users], len(users))
+    timed("save_docs (clarities, batched)", lambda: save_docs("clarities", {u: clarity for u in users}), len(users))
+
+    def append_turns():
+        for u in users:
+            for t in range(args.turns):
+                save_doc("feedback_logs", u, {"turn": t}, append_to_array="entries")
+    timed("save_doc append_to_array", append_turns, len(users) * args.turns)
+
+    def deferred_turns():
+        for u in users:
+            for t in range(args.turns):
+                save_doc("memories", u, {"last_turn": t}, defer=True)
+        flush_writes()
+    timed("save_doc defer=True + flush", deferred_turns, len(users) * args.turns)
+
+    doc_cache.clear()
+    timed("get_doc (cold)", lambda: [get_doc("settings", u) for u in users], len(users))
+    timed("get_doc (cached)", lambda: [get_doc("settings", u) for u in users], len(users))
+    doc_cache.clear()
+    timed("get_docs (cold)", lambda: get_docs("clarities", users), len(users))
+    timed("iter_docs (full scan)", lambda: sum(1 for _ in iter_docs("feedback_logs", page_size=100)), len(users))
+    timed("query_docs (where ==)", lambda: query_docs("settings", where=[("voice_id", "==", "v")]), len(users))
@@ -0,0 +1,87 @@
+# benchmarks/bench_vector_codec.py
+"""
+Size, decode speed and recall of the stored-vector encodings.
+
+    python benchmarks/bench_vector_codec.py
+    python benchmarks/bench_vector_codec.py --n 20000 --queries 200
+
+Data is synthetic but clustered (topics + noise) so neighbours are meaningful.
+Wire size is the protobuf payload Firestore sends for the vector field:
+an array of doubles costs ~11 bytes per element, a bytes field ~1 per byte.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vector_codec import encode_vector, decode_vector  # noqa: E402
+from vector_scoring import normalize_rows, search, quantize_int8, search_int8  # noqa: E402
+
+DIM = 1536
+
+
+def make_data(n, queries, topics=200, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, DIM), dtype=np.float32)
+    data = centers[rng.integers(0, topics, n)] + 0.8 * rng.standard_normal((n, DIM), dtype=np.float32)
+    probe = centers[rng.integers(0, topics, queries)] + 0.8 * rng.standard_normal((queries, DIM), dtype=np.float32)
+    return data * 0.02, probe * 0.02  # ada-002 component scale
+
+
+def wire_bytes(fields):
+    if "vector" in fields:
+        return len(fields["vector"]) * 11
+    return len(fields["vector_bytes"]) + 8 + (9 if "vector_scale" in fields else 0)
+
+
+def recall(truth, got):
+    hits = sum(len(set(t) & set(g)) for t, g in zip(truth, got))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    data, probe = make_data(args.n, args.queries)
+    exact = normalize_rows(data)
+    truth, _ = search(exact, probe, args.k)
+
+    print(f"N={args.n:,}  queries={args.queries}  recall@{args.k} vs float32 exact\n")
+    print(f"{'encoding':<10}{'wire B/vec':>12}{'RAM B/vec':>11}{'decode µs':>11}{'recall':>9}")
+    sample = data[:500]
+    for encoding in ["float32", "float16", "int8"]:
+        encoded = [encode_vector(v, encoding) for v in sample]
+        start = time.perf_counter()
+        for fields in encoded:
+            decode_vector(fields)
+        decode_us = (time.perf_counter() - start) / len(encoded) * 1e6
+
+        stored = normalize_rows(np.stack([decode_vector(encode_vector(v, encoding)) for v in data]))
+        got, _ = search(stored, probe, args.k)
+        ram = decode_vector(encoded[0]).nbytes
+        print(f"{encoding:<10}{wire_bytes(encoded[0]):>12,}{ram:>11,}{decode_us:>11.1f}{recall(truth, got):>9.3f}")
+
+    print("\nIndex scan (precision=int8)")
+    codes, scales = quantize_int8(exact)
+    rerank = exact.astype(np.float16)
+    for label, matrix in [("int8 only", None), ("int8 + float16 re-rank", rerank)]:
+        start = time.perf_counter()
+        got, _ = search_int8(codes, scales, probe, args.k, rerank_matrix=matrix)
+        ms = (time.perf_counter() - start) / args.queries * 1000
+        print(f"  {label:<24} recall {recall(truth, got):.3f}   {ms:.2f} ms/query")
+    start = time.perf_counter()
+    search(exact, probe, args.k)
+    print(f"  {'float32 exact':<24} recall 1.000   {(time.perf_counter() - start) / args.queries * 1000:.2f} ms/query")
+    print(f"\nIndex RAM per vector: float32 {DIM * 4:,} B, int8 mode {DIM + 4 + DIM * 2:,} B "
+          f"(int8 scan only touches {DIM + 4:,} B)")
+
+
+if __name__ == "__main__":
+    main()
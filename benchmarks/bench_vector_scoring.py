@@ -0,0 +1,87 @@
+# benchmarks/bench_vector_scoring.py
+"""
+Compare the old per-vector cosine_sim loop with the batched scoring engine.
+
+    python benchmarks/bench_vector_scoring.py
+    python benchmarks/bench_vector_scoring.py --sizes 1000 10000 100000 --queries 8
+
+The old path works on Python lists (that's what Firestore hands back), which
+takes ~50 bytes per float. Above --legacy-max it is timed on a sample and
+scaled linearly, since it is a straight loop.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vector_scoring import normalize_rows, search  # noqa: E402
+
+DIM = 1536
+
+
+# === 🐢 Old path (copied from vector_store before the index) ===
+def legacy_top_n(query_vec, user_vectors, top_n):
+    def cosine_sim(a, b):
+        a, b = np.array(a), np.array(b)
+        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    scored = [(v["text"], cosine_sim(query_vec, v["vector"])) for v in user_vectors]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [s[0] for s in scored[:top_n]]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n, queries, top_n, legacy_max, repeat):
+    rng = np.random.default_rng(n)
+    raw = rng.standard_normal((n, DIM), dtype=np.float32)
+    query_batch = rng.standard_normal((queries, DIM), dtype=np.float32)
+
+    build = timed(lambda: normalize_rows(raw), 1)
+    matrix = normalize_rows(raw)
+    single = timed(lambda: search(matrix, query_batch[0], top_n), repeat)
+    batch = timed(lambda: search(matrix, query_batch, top_n), repeat)
+
+    sample = min(n, legacy_max)
+    docs = [{"text": str(i), "vector": raw[i].tolist()} for i in range(sample)]
+    query_list = query_batch[0].tolist()
+    legacy = timed(lambda: legacy_top_n(query_list, docs, top_n), 1) * (n / sample)
+
+    # Sanity: both paths agree on the winners
+    if sample == n:
+        expected = legacy_top_n(query_list, docs, top_n)
+        got = [str(i) for i in search(matrix, query_batch[0], top_n)[0]]
+        assert expected == got, (expected, got)
+
+    scaled = "" if sample == n else f" (scaled from {sample})"
+    print(f"N={n:>7,}  legacy {legacy * 1000:9.1f} ms{scaled}")
+    print(f"           engine {single * 1000:9.2f} ms/query   "
+          f"batch {batch * 1000 / queries:7.2f} ms/query ({queries} queries)   "
+          f"normalize {build * 1000:7.1f} ms   speedup x{legacy / single:,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=8)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n, args.queries, args.top_n, args.legacy_max, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
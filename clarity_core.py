@@ -3,6 +3,7 @@ from datetime import datetime
 import openai
 import os
 from dotenv import load_dotenv
+from mood_engine import detect_mood
 
 CLARITY_DATA_PATH = "clarity_data.json"
 
@@ -176,37 +177,10 @@ def extract_values_from_text(text: str) -> dict:
 
 def detect_mood_from_text(text: str) -> str:
     """
-    Detect the user's mood from their text using GPT.
-    Returns one of: calm, sad, excited, angry, playful, thoughtful, neutral
+    Detect the user's mood from their text with the local mood engine.
+    Returns one of: calm, sad, happy, excited, angry, playful, thoughtful, neutral
     """
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": """
-                Detect the user's mood from their text.
-                Return exactly one of these moods:
-                - calm
-                - sad
-                - excited
-                - angry
-                - playful
-                - thoughtful
-                - neutral
-                
-                Example: "I'm so happy about my new job!"
-                Returns: "excited"
-                """},
-                {"role": "user", "content": text}
-            ],
-            temperature=0.3
-        )
-        
-        mood = response.choices[0].message.content.strip().lower()
-        return mood if mood in ["calm", "sad", "excited", "angry", "playful", "thoughtful", "neutral"] else "neutral"
-    except Exception as e:
-        print(f"Error detecting mood: {e}")
-        return "neutral"
+    return detect_mood(text)
 
 def analyze_feedback(feedback_text: str) -> dict:
     """
@@ -0,0 +1,31 @@
+# components/firestore_debug.py
+
+import os
+import streamlit as st
+from firestore_metrics import pop_rerun_cost
+
+# Set FIRESTORE_DEBUG=1 to show the panel
+DEBUG_PANEL = os.getenv("FIRESTORE_DEBUG", "0") == "1"
+
+def firestore_debug_panel():
+    """
+    Sidebar table of the Firestore calls made so far in this script run —
+    its reads, writes, bytes and time. Call it at the end of a page.
+    """
+    cost = pop_rerun_cost()
+    if not DEBUG_PANEL:
+        return
+    with st.sidebar.expander("🔥 Firestore cost (this rerun)", expanded=False):
+        if not cost:
+            st.caption("No Firestore calls.")
+            return
+        rows = [
+            {"op": op, "collection": collection, "calls": row["calls"], "docs": row["docs"],
+             "KB": round(row["bytes"] / 1024, 1), "ms": round(row["ms"], 1)}
+            for (op, collection), row in sorted(cost.items(), key=lambda item: -item[1]["ms"])
+        ]
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        st.caption(
+            f"{sum(r['calls'] for r in rows)} calls · {sum(r['docs'] for r in rows)} docs · "
+            f"{sum(r['KB'] for r in rows):.1f} KB · {sum(r['ms'] for r in rows):.0f} ms"
+        )
@@ -0,0 +1,31 @@
+# components/paginator.py
+
+import streamlit as st
+from firebase_client import get_page
+
+def paginated_docs(key, collection, page_size=20, **query):
+    """
+    Load one page of a Firestore query and render ◀ / ▶ controls for it.
+    The start cursor of every page visited so far lives in session_state,
+    so a rerun reads a single page. query takes get_page's where/select/order_by.
+    """
+    state_key = f"pager_{key}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = [None]
+    cursors = st.session_state[state_key]
+
+    docs, next_cursor = get_page(collection, page_size, cursors[-1], **query)
+
+    if len(cursors) > 1 or next_cursor:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("◀ Prev", key=f"{state_key}_prev", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            st.caption(f"Page {len(cursors)}")
+        with col3:
+            if st.button("Next ▶", key=f"{state_key}_next", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
+    return docs
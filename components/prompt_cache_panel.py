@@ -0,0 +1,36 @@
+# components/prompt_cache_panel.py
+
+import os
+import streamlit as st
+from prompt_cache import CACHE_MIN_TOKENS, STATIC_PREFIX_HASH, cache_stats, recent_requests
+
+# Set PROMPT_CACHE_DEBUG=1 to show the panel
+DEBUG_PANEL = os.getenv("PROMPT_CACHE_DEBUG", "0") == "1"
+
+def prompt_cache_panel():
+    """
+    Sidebar view of provider prompt caching: this session's recent chat
+    requests (prompt, cached and expected-reuse tokens, time to first token)
+    and the process-wide hit rate with TTFT for hits vs misses.
+    """
+    if not DEBUG_PANEL:
+        return
+    with st.sidebar.expander("⚡ Prompt cache", expanded=False):
+        rows = recent_requests()
+        if rows:
+            st.dataframe(
+                [{k: row[k] for k in ("prompt_tokens", "cached_tokens", "expected_reuse", "ttft_ms", "total_ms")}
+                 for row in reversed(rows)],
+                hide_index=True, use_container_width=True
+            )
+        else:
+            st.caption("No chat requests yet this session.")
+
+        totals = cache_stats.snapshot()
+        ttft = lambda ms: f"{ms:.0f} ms" if ms is not None else "–"
+        st.caption(
+            f"{totals['requests']} requests · {totals['hit_rate']:.0%} hit · "
+            f"{totals['cached_share']:.0%} of prompt tokens cached · "
+            f"TTFT hit {ttft(totals['ttft_hit_ms'])} / miss {ttft(totals['ttft_miss_ms'])}"
+        )
+        st.caption(f"Static prefix {STATIC_PREFIX_HASH} · prompts under {CACHE_MIN_TOKENS} tokens are never cached")
@@ -0,0 +1,76 @@
+# context_assembly.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+except ImportError:
+    get_script_run_ctx = None
+    SCRIPT_RUN_CONTEXT_ATTR_NAME = "streamlit_script_run_ctx"
+
+# Seconds each prompt source may take before its default is used instead
+CONTEXT_TIMEOUTS = {
+    "clarity": 2.0,
+    "long_memory": 2.0,
+    "style": 4.0,
+    "insights": 5.0,
+}
+CONTEXT_DEFAULT_TIMEOUT = 3.0
+
+
+def _run_with_ctx(fn, ctx):
+    # Lets st.* calls and per-rerun metrics inside the source reach the caller's
+    # session. add_script_run_ctx(thread, None) would re-attach the current ctx
+    # rather than clear it, so the thread attribute is restored directly.
+    thread = threading.current_thread()
+    previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+    setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, ctx)
+    start = time.perf_counter()
+    try:
+        return fn(), time.perf_counter() - start
+    finally:
+        if previous is None:
+            delattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME)
+        else:
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+
+
+# === 🧵 Concurrent Context Fetch ===
+def gather_context(sources, timeouts=CONTEXT_TIMEOUTS):
+    """
+    Run independent prompt sources concurrently.
+    sources is {name: (fn, default)} with zero-argument callables. Each one
+    gets its own timeout from timeouts; a source that times out or raises
+    yields its default, so the result is ready in about the time of the
+    slowest source (capped by its timeout). Returns ({name: value}, report)
+    where report is {name: (status, seconds)}.
+
+    Each call gets its own pool, one thread per source, so a hung source
+    from another request can't leave these queued behind it; late sources
+    finish on their own (bounded by their clients' timeouts) after their
+    result is dropped.
+    """
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+    start = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=max(len(sources), 1), thread_name_prefix="context")
+    futures = {name: pool.submit(_run_with_ctx, fn, ctx) for name, (fn, _) in sources.items()}
+    pool.shutdown(wait=False)
+    deadlines = {name: start + timeouts.get(name, CONTEXT_DEFAULT_TIMEOUT) for name in sources}
+
+    results, report = {}, {}
+    for name in sorted(futures, key=deadlines.get):
+        default = sources[name][1]
+        try:
+            results[name], seconds = futures[name].result(timeout=max(deadlines[name] - time.perf_counter(), 0))
+            report[name] = ("ok", seconds)
+        except FutureTimeout:
+            results[name] = default
+            report[name] = ("timeout", time.perf_counter() - start)
+            print(f"Context source '{name}' timed out, using default")
+        except Exception as e:
+            results[name] = default
+            report[name] = ("error", time.perf_counter() - start)
+            print(f"Context source '{name}' failed, using default: {e}")
+    return results, report
@@ -0,0 +1,99 @@
+# embedding_cache.py
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "user_data/embedding_cache.sqlite")
+MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+
+
+# === 🧠 Two-Tier Embedding Cache ===
+class EmbeddingCache:
+    """
+    Content-addressed cache for embeddings: an in-process LRU in front of a
+    local SQLite file. Keys are text hashes, scoped by embedding model.
+    Vectors are stored as raw float32 bytes.
+    """
+
+    def __init__(self, path=CACHE_PATH, memory_size=MEMORY_SIZE):
+        self.path = path
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+    def _db(self):
+        if self.conn is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self.conn = sqlite3.connect(self.path, check_same_thread=False)
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, "
+                    "PRIMARY KEY (model, key))"
+                )
+                self.conn.commit()
+            except sqlite3.Error as e:
+                print("Embedding cache disabled:", e)
+                self.path = None
+                self.conn = None
+        return self.conn
+
+    def _remember(self, cache_key, vector):
+        self.memory[cache_key] = vector
+        self.memory.move_to_end(cache_key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get(self, model, key):
+        """Return the cached float32 vector or None."""
+        cache_key = (model, key)
+        with self.lock:
+            vector = self.memory.get(cache_key)
+            if vector is not None:
+                self.memory.move_to_end(cache_key)
+                self.stats["memory_hits"] += 1
+                return vector
+
+            db = self._db()
+            row = None
+            if db is not None:
+                row = db.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND key = ?", (model, key)
+                ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            vector = np.frombuffer(row[0], dtype=np.float32)
+            self._remember(cache_key, vector)
+            self.stats["disk_hits"] += 1
+            return vector
+
+    def put(self, model, key, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        with self.lock:
+            self._remember((model, key), vector)
+            db = self._db()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                    (model, key, vector.tobytes()),
+                )
+                db.commit()
+            self.stats["writes"] += 1
+        return vector
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+
+# Shared by vector_store across the whole process
+embedding_cache = EmbeddingCache()
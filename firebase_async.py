@@ -0,0 +1,195 @@
+# firebase_async.py
+"""
+asyncio variant of the firebase_client helpers, backed by firestore.AsyncClient.
+
+The AsyncClient's gRPC channels are bound to the event loop that created
+them, and Streamlit reruns don't share one, so the client lives on a single
+background loop thread. Sync code calls gather_docs() or run(coro);
+coroutines running on that loop await the helpers directly.
+
+Reads and writes share firebase_client's doc cache and write-behind queue,
+so mixing the two APIs stays consistent. With DOC_BACKEND=sqlite the
+helpers run the sync versions in a worker thread instead.
+"""
+import asyncio
+import functools
+import threading
+from google.cloud import firestore
+from google.auth.exceptions import RefreshError
+from google.api_core.exceptions import Unauthenticated
+from firebase_client import (
+    service_account_credentials, doc_cache, write_queue, _handle_client_error, _build_query, DOC_BACKEND,
+    get_doc as get_doc_sync, save_doc as save_doc_sync, query_docs as query_docs_sync
+)
+from firestore_metrics import metrics, doc_size
+
+GATHER_TIMEOUT = 10.0
+
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+_credentials = None  # (creds, project_id), loaded on a page thread
+
+
+# === 🔁 Background Event Loop ===
+def _event_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="firestore-async", daemon=True).start()
+        return _loop
+
+def run(coro, timeout=GATHER_TIMEOUT):
+    """Run a coroutine on the Firestore loop and wait for its result (from sync code)."""
+    if DOC_BACKEND == "firestore":
+        _load_credentials()
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result(timeout)
+
+# === 🔥 AsyncClient (one per process, owned by the loop thread) ===
+def _load_credentials():
+    # Runs on the caller's thread: reading st.secrets and reporting a
+    # problem with st.error both need the page's script context, which
+    # the loop thread doesn't have
+    global _credentials
+    if _credentials is None:
+        creds, project = service_account_credentials()
+        if creds is not None:
+            _credentials = (creds, project)
+    return _credentials
+
+def _init_async_firestore():
+    global _client
+    if _client is None:
+        if _credentials is None:
+            return None
+        creds, project = _credentials
+        _client = firestore.AsyncClient(credentials=creds, project=project)
+    return _client
+
+def _handle_async_error(e):
+    global _client, _credentials
+    if isinstance(e, (RefreshError, Unauthenticated)):
+        _client = None
+        _credentials = None
+    _handle_client_error(e)
+
+async def _flush_pending(collection, doc_ids=None):
+    # Read-your-writes for deferred saves, same as the sync helpers
+    # (doc_ids=None: anything pending in the collection, as queries need)
+    if doc_ids is None:
+        pending = write_queue.has_pending_in(collection)
+    else:
+        pending = any(write_queue.has_pending(collection, doc_id) for doc_id in doc_ids)
+    if pending:
+        await asyncio.to_thread(write_queue.flush)
+
+def _sync_on_local(sync_helper):
+    # No AsyncClient for the SQLite backend; its reads are local anyway
+    def wrap(coro_fn):
+        @functools.wraps(coro_fn)
+        async def inner(*args, **kwargs):
+            if DOC_BACKEND != "firestore":
+                return await asyncio.to_thread(sync_helper, *args, **kwargs)
+            return await coro_fn(*args, **kwargs)
+        return inner
+    return wrap
+
+# === 🔧 Async Firestore Helpers ===
+@_sync_on_local(get_doc_sync)
+async def get_doc(collection, doc_id):
+    """
+    Get a document from Firestore (served from the doc cache while fresh).
+    """
+    cached = doc_cache.get(collection, doc_id)
+    if cached is not None:
+        return cached  # already includes any deferred saves (write-through)
+    await _flush_pending(collection, [doc_id])
+    version = doc_cache.version(collection, doc_id)
+    try:
+        db = _init_async_firestore()
+        if db is None:
+            return {}
+        doc = await db.collection(collection).document(doc_id).get()
+        data = doc.to_dict() if doc.exists else {}
+        doc_cache.put(collection, doc_id, data, version)
+        return data
+    except Exception as e:
+        _handle_async_error(e)
+        print(f"Error getting document: {str(e)}")
+        return {}
+
+async def get_docs(collection, doc_ids):
+    """
+    Get many documents concurrently. Returns {doc_id: data}; missing docs map to {}.
+    """
+    doc_ids = list(dict.fromkeys(doc_ids))
+    results = await asyncio.gather(*(get_doc(collection, doc_id) for doc_id in doc_ids))
+    return dict(zip(doc_ids, results))
+
+@_sync_on_local(save_doc_sync)
+async def save_doc(collection, doc_id, data, append_to_array=None):
+    """
+    Save a document to Firestore (merged, like firebase_client.save_doc).
+    """
+    await _flush_pending(collection, [doc_id])
+    try:
+        db = _init_async_firestore()
+        if db is None:
+            return False
+        doc_ref = db.collection(collection).document(doc_id)
+        if append_to_array:
+            await doc_ref.set({append_to_array: firestore.ArrayUnion([data])}, merge=True)
+        else:
+            await doc_ref.set(data, merge=True)
+        return True
+    except Exception as e:
+        _handle_async_error(e)
+        print(f"Error saving document: {str(e)}")
+        return False
+    finally:
+        doc_cache.invalidate(collection, doc_id)
+
+@_sync_on_local(query_docs_sync)
+async def query_docs(collection, where=None, select=None, limit=None, include_id=False,
+                     order_by=None, descending=False):
+    """
+    Run a filtered, projected query on the server (see firebase_client.query_docs).
+    """
+    await _flush_pending(collection)
+    try:
+        db = _init_async_firestore()
+        if db is None:
+            return []
+        query = _build_query(db, collection, where, select, order_by, descending)
+        if limit:
+            query = query.limit(limit)
+        if include_id:
+            return [{**doc.to_dict(), "id": doc.id} async for doc in query.stream()]
+        return [doc.to_dict() async for doc in query.stream()]
+    except Exception as e:
+        _handle_async_error(e)
+        print(f"Error querying documents: {str(e)}")
+        return []
+
+# === 🧺 Concurrent Page Loads ===
+def gather_docs(keys, timeout=GATHER_TIMEOUT):
+    """
+    Fetch [(collection, doc_id), ...] concurrently and return their data in
+    the same order ({} for missing docs). Results land in the doc cache, so
+    the regular loaders (load_user_settings, load_long_memory, ...) called
+    afterwards don't go back to Firestore.
+    """
+    async def fetch_all():
+        return await asyncio.gather(*(get_doc(collection, doc_id) for collection, doc_id in keys))
+
+    try:
+        # Recorded here, on the page's thread, so it counts toward the rerun's cost
+        with metrics.timed("gather", "+".join(sorted({c for c, _ in keys}))) as timer:
+            results = run(fetch_all(), timeout)
+            timer.docs, timer.bytes = len(results), sum(doc_size(r) for r in results)
+        return results
+    except Exception as e:
+        # Fall back to sequential sync reads rather than handing back empty docs
+        print(f"Error gathering documents, reading sequentially: {str(e)}")
+        return [get_doc_sync(collection, doc_id) for collection, doc_id in keys]
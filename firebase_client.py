@@ -2,11 +2,22 @@
 import firebase_admin
 from firebase_admin import credentials, initialize_app
 from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
 from google.oauth2 import service_account
+from google.auth.exceptions import RefreshError
+from google.api_core.exceptions import Unauthenticated
 import os
+import copy
+import itertools
 import json
+import atexit
+import threading
+import time
+from collections import OrderedDict
 import streamlit as st
 import requests
+from local_firestore import LocalFirestoreClient
+from firestore_metrics import metrics, doc_size
 
 # === 🔥 Initialize Firebase Admin SDK ===
 def init_firebase_admin():
@@ -44,15 +55,16 @@ def init_firebase_admin():
         return False
 
 # === 🔥 Initialize Firestore ===
-def init_firestore():
+def service_account_credentials():
+    """
+    Return (credentials, project_id) from st.secrets, or (None, None).
+    Shared by the sync client here and the AsyncClient in firebase_async.
+    """
     try:
         # Initialize Firebase Admin SDK first
         if not init_firebase_admin():
-            return None
-            
-        # Debug: Print available secrets
-        print("Available secrets:", list(st.secrets.keys()))
-        
+            return None, None
+
         # Check if we have the service account credentials
         if "GOOGLE_APPLICATION_CREDENTIALS" in st.secrets:
             try:
@@ -68,39 +80,532 @@ def init_firestore():
                 
                 # Create credentials object
                 creds = service_account.Credentials.from_service_account_info(service_account_info)
-                
-                # Initialize Firestore client
-                return firestore.Client(credentials=creds, project=service_account_info.get("project_id"))
+                return creds, service_account_info.get("project_id")
             except Exception as e:
                 st.error(f"❌ Error processing credentials: {e}")
-                return None
+                return None, None
         else:
             st.error("❌ Service account credentials not found in secrets. Please add GOOGLE_APPLICATION_CREDENTIALS to your secrets.")
-            return None
+            return None, None
+
+    except Exception as e:
+        st.error(f"❌ Firestore init failed: {str(e)}")
+        return None, None
+
+# "firestore" = Cloud Firestore; "sqlite" = local stand-in at DOC_BACKEND_PATH
+# (CI benchmarks, load tests, single-node installs — no secrets needed)
+DOC_BACKEND = os.getenv("DOC_BACKEND", "firestore")
+DOC_BACKEND_PATH = os.getenv("DOC_BACKEND_PATH", "user_data/firestore.sqlite")
 
+def _build_firestore_client():
+    if DOC_BACKEND == "sqlite":
+        return LocalFirestoreClient(DOC_BACKEND_PATH)
+    creds, project = service_account_credentials()
+    if creds is None:
+        return None
+    try:
+        return firestore.Client(credentials=creds, project=project)
     except Exception as e:
         st.error(f"❌ Firestore init failed: {str(e)}")
         return None
 
+# One client per process: firestore.Client is thread-safe and its gRPC
+# channels are meant to be reused, so every Streamlit session shares it.
+_client = None
+_client_lock = threading.Lock()
+_client_stats = {"created": 0, "reused": 0, "build_failures": 0, "resets": 0, "created_at": None}
+
+def init_firestore():
+    """
+    Return the shared Firestore client, building it on first use
+    (or after reset_firestore).
+    """
+    global _client
+    client = _client
+    if client is not None:
+        _client_stats["reused"] += 1
+        return client
+
+    with _client_lock:
+        if _client is None:
+            _client = _build_firestore_client()
+            if _client is None:
+                _client_stats["build_failures"] += 1
+            else:
+                _client_stats["created"] += 1
+                _client_stats["created_at"] = time.time()
+        else:
+            _client_stats["reused"] += 1
+        return _client
+
+def reset_firestore():
+    """Drop the shared client so the next call rebuilds it with fresh credentials."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            try:
+                _client.close()
+            except Exception:
+                pass
+            _client = None
+            _client_stats["resets"] += 1
+
+def _handle_client_error(e):
+    # Expired/revoked credentials leave the cached client unusable — rebuild next time
+    if isinstance(e, (RefreshError, Unauthenticated)):
+        print(f"Firestore credentials rejected, resetting client: {e}")
+        reset_firestore()
+
+def get_connection_stats():
+    """Counters for the shared client (creations, reuses, failures, resets)."""
+    stats = dict(_client_stats)
+    stats["connected"] = _client is not None
+    return stats
+
+# === 🗃 Read-Through Document Cache ===
+# Seconds a cached get_doc result stays fresh, per collection
+DOC_CACHE_TTLS = {
+    "settings": 300,
+    "long_memory": 300,
+    "clarities": 60,
+    "public_mirrors": 60,
+    "memories": 30,
+    "style_profiles": 300,
+    "vector_index_generations": 60,
+    "comments": 15,
+}
+DOC_CACHE_DEFAULT_TTL = float(os.getenv("DOC_CACHE_DEFAULT_TTL", "10"))
+DOC_CACHE_MAX_ENTRIES = int(os.getenv("DOC_CACHE_MAX_ENTRIES", "5000"))
+
+class DocCache:
+    """
+    Per-process LRU of get_doc results with per-collection TTLs. Writes made
+    through this module invalidate the entry, except deferred saves, which
+    are merged into it (write-through); callers always get a copy.
+    Each write also bumps the doc's version: a reader takes version() before
+    going to Firestore and hands it to put(), which drops the result if a
+    write happened meanwhile (it may predate that write).
+    """
+
+    def __init__(self, ttls, default_ttl, max_entries):
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (collection, doc_id) -> (expires_at, data)
+        self.versions = {}             # (collection, doc_id) -> counter at its last write
+        self.collection_versions = {}  # collection -> counter at its last whole-collection invalidate
+        self.version_floor = 0         # versions of keys pruned from self.versions
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, collection, doc_id):
+        key = (collection, doc_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, data = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+        return copy.deepcopy(data)
+
+    def version(self, collection, doc_id):
+        with self.lock:
+            return self._version((collection, doc_id))
+
+    def _version(self, key):
+        return self.collection_versions.get(key[0], 0), self.versions.get(key, self.version_floor)
+
+    def _bump(self, key):
+        # caller holds self.lock
+        self.versions[key] = next(self.counter)
+        if len(self.versions) > self.max_entries:
+            # Everything pruned reads as the newest version: in-flight reads
+            # of those docs just skip their put
+            self.version_floor = next(self.counter)
+            self.versions.clear()
+
+    def put(self, collection, doc_id, data, version=None):
+        ttl = self.ttls.get(collection, self.default_ttl)
+        if ttl <= 0:
+            return
+        with self.lock:
+            if version is not None and self._version((collection, doc_id)) != version:
+                return  # written while this read was in flight
+            self.entries[(collection, doc_id)] = (time.time() + ttl, copy.deepcopy(data))
+            self.entries.move_to_end((collection, doc_id))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def apply(self, collection, doc_id, data, append_to_array=None):
+        """
+        Merge a queued write into a fresh cached copy, the way Firestore will
+        (set(merge=True), or ArrayUnion for appends). Returns False when the
+        doc isn't cached, so the caller can drop the entry instead.
+        """
+        key = (collection, doc_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            self._bump(key)
+            if entry is None or entry[0] < time.time():
+                return False
+            cached = entry[1]
+            if append_to_array:
+                items = cached.get(append_to_array)
+                if not isinstance(items, list):
+                    items = cached[append_to_array] = []
+                if data not in items:
+                    items.append(copy.deepcopy(data))
+            else:
+                _merge_fields(cached, data)
+            self.entries.move_to_end(key)
+            return True
+
+    def invalidate(self, collection, doc_id=None):
+        """Drop one entry, or a whole collection when doc_id is None."""
+        with self.lock:
+            if doc_id is not None:
+                self._bump((collection, doc_id))
+                keys = [(collection, doc_id)] if (collection, doc_id) in self.entries else []
+            else:
+                self.collection_versions[collection] = next(self.counter)
+                keys = [key for key in self.entries if key[0] == collection]
+            for key in keys:
+                del self.entries[key]
+            self.stats["invalidations"] += len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.versions.clear()
+            self.version_floor = next(self.counter)
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats, entries=len(self.entries))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+doc_cache = DocCache(DOC_CACHE_TTLS, DOC_CACHE_DEFAULT_TTL, DOC_CACHE_MAX_ENTRIES)
+_listeners = {}
+
+def watch_collection(collection):
+    """
+    Opt-in cross-process invalidation: a Firestore snapshot listener that
+    drops cached docs whenever another process changes them. The listener
+    streams the whole collection once, so only use it on small ones.
+    """
+    if collection in _listeners:
+        return True
+    if DOC_BACKEND != "firestore":
+        return False  # one local file per node: every write already goes through this cache
+    db = init_firestore()
+    if db is None:
+        return False
+
+    def on_snapshot(_docs, changes, _read_time):
+        for change in changes:
+            doc_cache.invalidate(collection, change.document.id)
+
+    _listeners[collection] = db.collection(collection).on_snapshot(on_snapshot)
+    return True
+
+for _collection in filter(None, os.getenv("DOC_CACHE_WATCH", "").split(",")):
+    watch_collection(_collection.strip())
+
+# === 📮 Write-Behind Queue ===
+WRITE_FLUSH_INTERVAL = float(os.getenv("WRITE_FLUSH_INTERVAL", "0.5"))
+WRITE_MAX_RETRIES = 3
+
+def _merge_fields(base, update):
+    # Same semantics as set(merge=True): nested maps merge, everything else replaces
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge_fields(base[key], value)
+        else:
+            base[key] = copy.deepcopy(value)
+    return base
+
+class WriteBehindQueue:
+    """
+    Coalesces deferred save_doc calls per document and commits them as
+    WriteBatch commits from a background thread. flush() is a barrier;
+    flush listeners are told which docs were committed (or failed).
+    A batch that still fails after its retries goes back into the queue
+    and is tried again after a backoff, so a Firestore outage delays
+    deferred writes instead of dropping them.
+    """
+
+    def __init__(self, interval=WRITE_FLUSH_INTERVAL):
+        self.interval = interval
+        self.pending = OrderedDict()  # (collection, doc_id) -> {"fields": {...}, "unions": {field: [items]}}
+        self.in_flight = 0
+        self.in_flight_keys = set()   # keys of the batch being committed right now
+        self.flush_requested = False
+        self.failures = 0             # consecutive failed batches
+        self.retry_at = 0.0
+        self.cond = threading.Condition()
+        self.listeners = []
+        self.thread = None
+        self.stats = {"queued": 0, "coalesced": 0, "committed": 0, "batches": 0, "failed": 0}
+
+    def enqueue(self, collection, doc_id, data, append_to_array=None):
+        key = (collection, doc_id)
+        with self.cond:
+            was_empty = not self.pending
+            entry = self.pending.get(key)
+            if entry is None:
+                entry = self.pending[key] = {"fields": {}, "unions": {}}
+            else:
+                self.stats["coalesced"] += 1
+            _add_to_entry(entry, data, append_to_array)
+            self.stats["queued"] += 1
+            self._ensure_thread()
+            # Only wake the writer when there's new work; waking it on every
+            # write would cut its coalescing wait short
+            if was_empty:
+                self.cond.notify_all()
+
+    def has_pending(self, collection, doc_id):
+        key = (collection, doc_id)
+        with self.cond:
+            return key in self.pending or key in self.in_flight_keys
+
+    def has_pending_in(self, collection):
+        with self.cond:
+            return any(key[0] == collection for key in itertools.chain(self.pending, self.in_flight_keys))
+
+    def add_listener(self, callback):
+        """callback(keys, error) runs after each commit; error is None on success."""
+        self.listeners.append(callback)
+
+    def flush(self, timeout=10.0):
+        """Block until everything queued so far is committed. Returns False on timeout."""
+        deadline = time.time() + timeout
+        with self.cond:
+            self.flush_requested = True
+            self.cond.notify_all()
+            while self.pending or self.in_flight:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="firestore-write-behind", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                # Let more writes coalesce (cut short by flush), and back off after failures
+                coalesce_until = time.time() + self.interval
+                while True:
+                    now = time.time()
+                    until = self.retry_at if self.flush_requested else max(coalesce_until, self.retry_at)
+                    if now >= until:
+                        break
+                    self.cond.wait(until - now)
+                items = list(self.pending.items())[:500]
+                for key, _ in items:
+                    del self.pending[key]
+                if not self.pending:
+                    self.flush_requested = False
+                self.in_flight_keys.update(key for key, _ in items)
+                self.in_flight += 1
+            error = RuntimeError("Commit did not finish")
+            try:
+                error = self._commit(items)
+            finally:
+                with self.cond:
+                    self.in_flight -= 1
+                    self.in_flight_keys.clear()
+                    if error is None:
+                        self.failures = 0
+                        self.retry_at = 0.0
+                    else:
+                        self._requeue(items)
+                        self.failures += 1
+                        self.retry_at = time.time() + min(2 ** self.failures, 30)
+                    self.cond.notify_all()
+
+    def _requeue(self, items):
+        # Failed entries go back in front; anything queued for the same doc
+        # during the commit is newer and layers on top (caller holds cond)
+        newer = self.pending
+        self.pending = OrderedDict()
+        for key, entry in items:
+            if key in newer:
+                update = newer.pop(key)
+                _add_to_entry(entry, update["fields"])
+                for field, values in update["unions"].items():
+                    for value in values:
+                        _add_to_entry(entry, value, field)
+            self.pending[key] = entry
+        self.pending.update(newer)
+
+    def _commit(self, items):
+        """Commit one batch with retries; returns the last error, or None."""
+        keys = [key for key, _ in items]
+        error = None
+        start = time.perf_counter()
+        for attempt in range(WRITE_MAX_RETRIES):
+            try:
+                db = init_firestore()
+                if db is None:
+                    raise RuntimeError("Firestore unavailable")
+                batch = db.batch()
+                for (collection, doc_id), entry in items:
+                    data = dict(entry["fields"])
+                    for field, values in entry["unions"].items():
+                        data[field] = firestore.ArrayUnion(values)
+                    batch.set(db.collection(collection).document(doc_id), data, merge=True)
+                batch.commit()
+                error = None
+                break
+            except Exception as e:
+                _handle_client_error(e)
+                error = e
+                if attempt + 1 < WRITE_MAX_RETRIES:
+                    time.sleep(0.5 * 2 ** attempt)
+
+        # No cache invalidation here: save_doc already merged these writes
+        # into the cached copies, and failed ones are retried until they land
+        per_collection = {}
+        for (collection, doc_id), entry in items:
+            count, size = per_collection.get(collection, (0, 0))
+            per_collection[collection] = (count + 1, size + doc_size(entry["fields"]) + doc_size(entry["unions"]))
+        for collection, (count, size) in per_collection.items():
+            metrics.record("write_behind", collection, time.perf_counter() - start, count, size, error is not None)
+        if error is None:
+            self.stats["committed"] += len(keys)
+            self.stats["batches"] += 1
+        else:
+            self.stats["failed"] += len(keys)
+            print(f"❌ Deferred write failed for {len(keys)} docs, will retry: {error}")
+        for callback in self.listeners:
+            try:
+                callback(keys, error)
+            except Exception as e:
+                print(f"Write listener error: {e}")
+        return error
+
+def _add_to_entry(entry, data, append_to_array=None):
+    # Fold one save into a pending entry: a field write replaces any queued
+    # ArrayUnion for that field; an append extends a pending list or union
+    if append_to_array:
+        if append_to_array in entry["fields"] and isinstance(entry["fields"][append_to_array], list):
+            entry["fields"][append_to_array].append(copy.deepcopy(data))
+        else:
+            entry["unions"].setdefault(append_to_array, []).append(copy.deepcopy(data))
+    else:
+        for field in data:
+            entry["unions"].pop(field, None)
+        _merge_fields(entry["fields"], data)
+
+write_queue = WriteBehindQueue()
+atexit.register(write_queue.flush)
+
+def flush_writes(timeout=10.0):
+    """Barrier: wait until every deferred save_doc has been committed."""
+    return write_queue.flush(timeout)
+
 # === 🔧 Firestore Helpers ===
+# Client-side deadline (seconds) for single reads and query pages, so a hung
+# RPC gives up instead of holding its thread
+READ_TIMEOUT = float(os.getenv("FIRESTORE_READ_TIMEOUT", "10"))
+
 def get_doc(collection, doc_id):
     """
-    Get a document from Firestore.
+    Get a document from Firestore (served from the doc cache while fresh).
     """
+    cached = doc_cache.get(collection, doc_id)
+    if cached is not None:
+        return cached  # already includes any deferred saves (write-through)
+    if write_queue.has_pending(collection, doc_id):
+        write_queue.flush()  # read-your-writes for deferred saves
+    version = doc_cache.version(collection, doc_id)
     try:
         db = init_firestore()
         if db is None:
             return {}
-        doc = db.collection(collection).document(doc_id).get()
-        return doc.to_dict() if doc.exists else {}
+        with metrics.timed("get", collection) as timer:
+            doc = db.collection(collection).document(doc_id).get(timeout=READ_TIMEOUT)
+            data = doc.to_dict() if doc.exists else {}
+            timer.docs, timer.bytes = 1, doc_size(data)
+        doc_cache.put(collection, doc_id, data, version)
+        return data
     except Exception as e:
+        _handle_client_error(e)
         print(f"Error getting document: {str(e)}")
         return {}
 
-def save_doc(collection, doc_id, data, append_to_array=None):
+def get_docs(collection, doc_ids, chunk_size=300):
+    """
+    Get many documents in as few RPCs as possible (Firestore get_all).
+    Returns {doc_id: data}; missing docs map to {}. Cached docs are not re-read.
+    """
+    doc_ids = list(dict.fromkeys(doc_ids))
+    results = {}
+    missing = []
+    for doc_id in doc_ids:
+        cached = doc_cache.get(collection, doc_id)
+        if cached is not None:
+            results[doc_id] = cached
+        else:
+            missing.append(doc_id)
+    if not missing:
+        return results
+    if any(write_queue.has_pending(collection, doc_id) for doc_id in missing):
+        write_queue.flush()
+    versions = {doc_id: doc_cache.version(collection, doc_id) for doc_id in missing}
+
+    try:
+        db = init_firestore()
+        if db is None:
+            return {**results, **{doc_id: {} for doc_id in missing}}
+        for start in range(0, len(missing), chunk_size):
+            refs = [db.collection(collection).document(doc_id) for doc_id in missing[start:start + chunk_size]]
+            with metrics.timed("get_all", collection) as timer:
+                for doc in db.get_all(refs):
+                    data = doc.to_dict() if doc.exists else {}
+                    doc_cache.put(collection, doc.id, data, versions.get(doc.id))
+                    results[doc.id] = data
+                    timer.bytes += doc_size(data)
+                timer.docs = len(refs)
+    except Exception as e:
+        _handle_client_error(e)
+        print(f"Error getting documents: {str(e)}")
+    for doc_id in missing:
+        results.setdefault(doc_id, {})
+    return results
+
+def save_doc(collection, doc_id, data, append_to_array=None, defer=False):
     """
     Save a document to Firestore.
+    With defer=True the write is queued and committed in the background;
+    a cached copy of the doc is updated in place so reads don't wait for it.
     """
+    if defer:
+        write_queue.enqueue(collection, doc_id, data, append_to_array)
+        if not doc_cache.apply(collection, doc_id, data, append_to_array):
+            doc_cache.invalidate(collection, doc_id)
+        return True
+    if write_queue.has_pending(collection, doc_id):
+        write_queue.flush()  # keep writes to one doc in order
     try:
         db = init_firestore()
         if not db:
@@ -108,7 +613,9 @@ def save_doc(collection, doc_id, data, append_to_array=None):
             
         doc_ref = db.collection(collection).document(doc_id)
         if append_to_array:
-            doc_ref.set({append_to_array: firestore.ArrayUnion([data])}, merge=True)
+            with metrics.timed("set", collection) as timer:
+                timer.docs, timer.bytes = 1, doc_size(data)
+                doc_ref.set({append_to_array: firestore.ArrayUnion([data])}, merge=True)
         else:
             # Convert data to Firestore format
             firestore_data = {}
@@ -119,11 +626,45 @@ def save_doc(collection, doc_id, data, append_to_array=None):
                     firestore_data[key] = value
                 else:
                     firestore_data[key] = value
-            doc_ref.set(firestore_data, merge=True)
+            with metrics.timed("set", collection) as timer:
+                timer.docs, timer.bytes = 1, doc_size(firestore_data)
+                doc_ref.set(firestore_data, merge=True)
         return True
     except Exception as e:
+        _handle_client_error(e)
         st.error(f"❌ Error saving document: {str(e)}")
         return False
+    finally:
+        doc_cache.invalidate(collection, doc_id)
+
+def save_docs(collection, docs, batch_size=500):
+    """
+    Save many documents with batched writes ({doc_id: data}, merged like save_doc).
+    Firestore allows at most 500 writes per batch.
+    """
+    try:
+        db = init_firestore()
+        if not db:
+            return False
+
+        items = list(docs.items())
+        for start in range(0, len(items), batch_size):
+            chunk = items[start:start + batch_size]
+            with metrics.timed("batch_set", collection) as timer:
+                batch = db.batch()
+                for doc_id, data in chunk:
+                    batch.set(db.collection(collection).document(doc_id), data, merge=True)
+                    timer.bytes += doc_size(data)
+                batch.commit()
+                timer.docs = len(chunk)
+        return True
+    except Exception as e:
+        _handle_client_error(e)
+        st.error(f"❌ Error saving documents: {str(e)}")
+        return False
+    finally:
+        for doc_id in docs:
+            doc_cache.invalidate(collection, doc_id)
 
 def update_doc(collection, doc_id, data):
     """
@@ -132,12 +673,17 @@ def update_doc(collection, doc_id, data):
     try:
         db = init_firestore()
         if db:
-            db.collection(collection).document(doc_id).update(data)
+            with metrics.timed("update", collection) as timer:
+                timer.docs, timer.bytes = 1, doc_size(data)
+                db.collection(collection).document(doc_id).update(data)
             return True
         return False
     except Exception as e:
+        _handle_client_error(e)
         st.error(f"❌ Error updating document: {str(e)}")
         return False
+    finally:
+        doc_cache.invalidate(collection, doc_id)
 
 def delete_doc(collection, doc_id):
     """
@@ -146,26 +692,168 @@ def delete_doc(collection, doc_id):
     try:
         db = init_firestore()
         if db:
-            db.collection(collection).document(doc_id).delete()
+            with metrics.timed("delete", collection) as timer:
+                timer.docs = 1
+                db.collection(collection).document(doc_id).delete()
             return True
         return False
     except Exception as e:
+        _handle_client_error(e)
         st.error(f"❌ Error deleting document: {str(e)}")
         return False
+    finally:
+        doc_cache.invalidate(collection, doc_id)
+
+def delete_docs(collection, doc_ids, batch_size=500):
+    """
+    Delete many documents with batched writes.
+    """
+    try:
+        db = init_firestore()
+        if not db:
+            return False
+
+        doc_ids = list(doc_ids)
+        for start in range(0, len(doc_ids), batch_size):
+            chunk = doc_ids[start:start + batch_size]
+            with metrics.timed("batch_delete", collection) as timer:
+                batch = db.batch()
+                for doc_id in chunk:
+                    batch.delete(db.collection(collection).document(doc_id))
+                batch.commit()
+                timer.docs = len(chunk)
+        return True
+    except Exception as e:
+        _handle_client_error(e)
+        st.error(f"❌ Error deleting documents: {str(e)}")
+        return False
+    finally:
+        for doc_id in doc_ids:
+            doc_cache.invalidate(collection, doc_id)
 
 def get_all_docs(collection):
     """
     Get all documents from a collection.
+    Prefer iter_docs for anything that can grow: this holds the whole set.
     """
+    try:
+        return list(iter_docs(collection))
+    except Exception as e:
+        st.error(f"❌ Error getting documents: {str(e)}")
+        return []
+
+def _build_query(db, collection, where=None, select=None, order_by=None, descending=False):
+    query = db.collection(collection)
+    for field, op, value in where or []:
+        query = query.where(filter=FieldFilter(field, op, value))
+    if select:
+        if order_by and order_by not in select:
+            select = list(select) + [order_by]  # cursors need the order field
+        query = query.select(select)
+    if order_by:
+        direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+        query = query.order_by(order_by, direction=direction)
+    return query
+
+def _doc_data(doc, include_id):
+    return {**doc.to_dict(), "id": doc.id} if include_id else doc.to_dict()
+
+def query_docs(collection, where=None, select=None, limit=None, include_id=False,
+               order_by=None, descending=False):
+    """
+    Run a filtered, projected query on the server.
+    where is a list of (field, op, value) tuples, e.g. [("user_id", "==", uid)];
+    select is a list of field paths to return instead of the whole document.
+    order_by + limit gives a tail read, e.g. order_by="ts", descending=True, limit=5.
+    """
+    if write_queue.has_pending_in(collection):
+        write_queue.flush()  # queries see deferred saves too
     try:
         db = init_firestore()
         if db is None:
             return []
-        return [doc.to_dict() for doc in db.collection(collection).stream()]
+        query = _build_query(db, collection, where, select, order_by, descending)
+        if limit:
+            query = query.limit(limit)
+        with metrics.timed("query", collection) as timer:
+            docs = [_doc_data(doc, include_id) for doc in query.stream(timeout=READ_TIMEOUT)]
+            timer.docs, timer.bytes = len(docs), sum(doc_size(d) for d in docs)
+        return docs
     except Exception as e:
-        st.error(f"❌ Error getting documents: {str(e)}")
+        _handle_client_error(e)
+        st.error(f"❌ Error querying documents: {str(e)}")
         return []
 
+PAGE_SIZE = 300
+PAGE_RETRIES = 3  # attempts per page before iter_docs gives up
+
+def iter_docs(collection, where=None, select=None, order_by=None, descending=False,
+              page_size=PAGE_SIZE, include_id=False):
+    """
+    Stream a query page by page using query cursors. Only one page is held
+    at a time and the first docs are yielded before the scan finishes.
+    where/select are as in query_docs; order_by is a field path (docs
+    without that field are skipped by Firestore).
+    A page that fails is retried from the last cursor; if it keeps failing
+    the error is raised, so a cut-short scan never looks complete.
+    """
+    if write_queue.has_pending_in(collection):
+        write_queue.flush()
+    last = None
+    while True:
+        for attempt in range(PAGE_RETRIES):
+            try:
+                db = init_firestore()
+                if db is None:
+                    raise RuntimeError("Firestore unavailable")
+                query = _build_query(db, collection, where, select, order_by, descending).limit(page_size)
+                if last is not None:
+                    query = query.start_after(last)
+                with metrics.timed("query", collection) as timer:
+                    page = list(query.stream(timeout=READ_TIMEOUT))
+                    docs = [_doc_data(doc, include_id) for doc in page]
+                    timer.docs, timer.bytes = len(docs), sum(doc_size(d) for d in docs)
+                break
+            except Exception as e:
+                _handle_client_error(e)
+                print(f"Error paging documents (attempt {attempt + 1}): {str(e)}")
+                if attempt + 1 == PAGE_RETRIES:
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+        yield from docs
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+def get_page(collection, page_size=20, cursor=None, where=None, select=None, order_by=None, descending=False):
+    """
+    One page of a query, for UI pagination. cursor is the id of the last doc
+    on the previous page (None for the first page). Returns (docs, next_cursor);
+    docs include their "id" and next_cursor is None on the last page.
+    """
+    try:
+        db = init_firestore()
+        if db is None:
+            return [], None
+        # One extra doc tells us whether there is a next page
+        query = _build_query(db, collection, where, select, order_by, descending).limit(page_size + 1)
+        if cursor is not None:
+            with metrics.timed("get", collection) as timer:
+                snapshot = db.collection(collection).document(cursor).get()
+                timer.docs = 1
+            if snapshot.exists:
+                query = query.start_after(snapshot)
+        with metrics.timed("query", collection) as timer:
+            page = list(query.stream())
+            docs = [_doc_data(doc, True) for doc in page[:page_size]]
+            timer.docs, timer.bytes = len(page), sum(doc_size(d) for d in docs)
+    except Exception as e:
+        _handle_client_error(e)
+        st.error(f"❌ Error loading page: {str(e)}")
+        return [], None
+    next_cursor = page[page_size - 1].id if len(page) > page_size else None
+    return docs, next_cursor
+
 # === 🔐 Authentication Functions ===
 def sign_in_with_email_and_password(email, password):
     """
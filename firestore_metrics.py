@@ -0,0 +1,252 @@
+# firestore_metrics.py
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    get_script_run_ctx = None
+
+# Set FIRESTORE_METRICS=0 to turn recording off entirely
+METRICS_ENABLED = os.getenv("FIRESTORE_METRICS", "1") != "0"
+# Appended to at exit (one line per series) when set
+METRICS_JSONL_PATH = os.getenv("FIRESTORE_METRICS_JSONL")
+# Serves /metrics in Prometheus text format when set (on localhost unless a host is given)
+METRICS_PORT = os.getenv("FIRESTORE_METRICS_PORT")
+METRICS_HOST = os.getenv("FIRESTORE_METRICS_HOST", "127.0.0.1")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RERUN_KEY = "_firestore_rerun_cost"
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+_OWN_FILES = {os.path.abspath(__file__), os.path.join(APP_ROOT, "firebase_client.py")}
+
+
+# === 🏷 Tags ===
+def collection_group(collection):
+    """users/abc123/vectors -> users/*/vectors, so labels don't grow per user."""
+    parts = collection.split("/")
+    return "/".join("*" if i % 2 else part for i, part in enumerate(parts))
+
+def calling_page():
+    """
+    Name of the Streamlit page script that triggered this call: the outermost
+    module-level frame inside the app. Background threads report "background".
+    """
+    page = "background"
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (frame.f_code.co_name == "<module>" and filename.startswith(APP_ROOT)
+                and filename not in _OWN_FILES):
+            page = os.path.relpath(filename, APP_ROOT)
+        frame = frame.f_back
+    return page
+
+def doc_size(value):
+    """Approximate Firestore storage size of a value, in bytes."""
+    if isinstance(value, dict):
+        return sum(len(k.encode("utf-8")) + 1 + doc_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(doc_size(v) for v in value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if value is None or isinstance(value, bool):
+        return 1
+    return 8
+
+
+# === 📊 Recorder ===
+class OpTimer:
+    __slots__ = ("docs", "bytes")
+
+    def __init__(self):
+        self.docs = 0
+        self.bytes = 0
+
+
+class FirestoreMetrics:
+    """
+    Counters and latency histograms per (op, collection, page). Each call is
+    also added to the current script run's tally in session_state, which
+    the debug panel shows.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, op, collection):
+        """Time one operation; set .docs / .bytes on the yielded timer."""
+        timer = OpTimer()
+        if not METRICS_ENABLED:
+            yield timer
+            return
+        start = time.perf_counter()
+        error = False
+        try:
+            yield timer
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record(op, collection, time.perf_counter() - start, timer.docs, timer.bytes, error)
+
+    def record(self, op, collection, seconds, docs=0, nbytes=0, error=False):
+        tally = _run_tally()
+        page = tally["page"] if tally is not None else None
+        if page is None:
+            page = calling_page()
+            if tally is not None and page != "background":
+                tally["page"] = page  # one stack walk per script run
+        key = (op, collection_group(collection), page)
+        with self.lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = {
+                    "calls": 0, "errors": 0, "docs": 0, "bytes": 0, "seconds": 0.0,
+                    "buckets": [0] * (len(self.buckets) + 1)
+                }
+            s["calls"] += 1
+            s["errors"] += int(error)
+            s["docs"] += docs
+            s["bytes"] += nbytes
+            s["seconds"] += seconds
+            s["buckets"][self._bucket(seconds)] += 1
+        if tally is not None:
+            row = tally["ops"].setdefault((key[0], key[1]), {"calls": 0, "docs": 0, "bytes": 0, "ms": 0.0})
+            row["calls"] += 1
+            row["docs"] += docs
+            row["bytes"] += nbytes
+            row["ms"] += seconds * 1000
+
+    def _bucket(self, seconds):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                return i
+        return len(self.buckets)
+
+    # === 📤 Export ===
+    def snapshot(self):
+        with self.lock:
+            return [
+                {"op": op, "collection": collection, "page": page, **dict(s, buckets=list(s["buckets"]))}
+                for (op, collection, page), s in self.series.items()
+            ]
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+    def to_prometheus(self):
+        """Prometheus text exposition of every series."""
+        lines = [
+            "# TYPE firestore_op_seconds histogram",
+            "# TYPE firestore_op_errors_total counter",
+            "# TYPE firestore_docs_total counter",
+            "# TYPE firestore_bytes_total counter",
+        ]
+        for s in self.snapshot():
+            labels = ",".join(f'{k}="{_escape(s[k])}"' for k in ("op", "collection", "page"))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), s["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'firestore_op_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"firestore_op_seconds_sum{{{labels}}} {s['seconds']:.6f}")
+            lines.append(f"firestore_op_seconds_count{{{labels}}} {s['calls']}")
+            lines.append(f"firestore_op_errors_total{{{labels}}} {s['errors']}")
+            lines.append(f"firestore_docs_total{{{labels}}} {s['docs']}")
+            lines.append(f"firestore_bytes_total{{{labels}}} {s['bytes']}")
+        return "\n".join(lines) + "\n"
+
+    def write_jsonl(self, path):
+        """Append one JSON line per series, stamped with the current time."""
+        now = datetime.utcnow().isoformat()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            for s in self.snapshot():
+                f.write(json.dumps({"time": now, **s}) + "\n")
+
+def _escape(value):
+    return re.sub(r'(["\\])', r"\\\1", str(value)).replace("\n", "\\n")
+
+metrics = FirestoreMetrics()
+
+
+# === 📈 Per-Rerun Cost ===
+def _run_marker(ctx):
+    # ScriptRunContext.reset() gives each script run a fresh set here;
+    # holding on to the object (not its id()) identifies the run
+    return ctx.widget_ids_this_run
+
+def _run_tally():
+    """
+    The current script run's tally in session_state, started fresh when a
+    new run begins (so pages without the debug panel, or runs cut short by
+    st.stop(), don't leak into the next one). None outside a script run.
+    """
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+    if ctx is None:
+        return None
+    import streamlit as st
+    tally = st.session_state.get(RERUN_KEY)
+    if tally is None or tally["run"] is not _run_marker(ctx):
+        tally = st.session_state[RERUN_KEY] = {"run": _run_marker(ctx), "page": None, "ops": {}}
+    return tally
+
+def pop_rerun_cost():
+    """Return and clear this run's tally: {(op, collection): {calls, docs, bytes, ms}}."""
+    tally = _run_tally()
+    if tally is None:
+        return {}
+    ops, tally["ops"] = tally["ops"], {}
+    return ops
+
+
+# === 🌐 Prometheus Endpoint ===
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_server = None
+
+def start_metrics_server(port):
+    """Serve /metrics on a daemon thread (once per process)."""
+    global _server
+    if _server is None:
+        _server = HTTPServer((METRICS_HOST, int(port)), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="firestore-metrics", daemon=True).start()
+    return _server
+
+if METRICS_ENABLED and METRICS_PORT:
+    try:
+        start_metrics_server(METRICS_PORT)
+    except OSError as e:
+        print(f"Metrics server not started: {e}")  # another Streamlit process holds the port
+if METRICS_ENABLED and METRICS_JSONL_PATH:
+    atexit.register(metrics.write_jsonl, METRICS_JSONL_PATH)
@@ -0,0 +1,105 @@
+# lexical_index.py
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "i", "i'm",
+    "if", "in", "is", "it", "it's", "me", "my", "of", "on", "or", "so", "that", "the",
+    "this", "to", "was", "we", "were", "with", "you", "your",
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+# === 📚 Per-User BM25 Index ===
+class BM25Index:
+    """Inverted index over a user's memory texts, scored with Okapi BM25."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self.doc_lengths = {}
+        self.texts = {}
+        self.total_length = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id, text):
+        with self.lock:
+            if doc_id in self.doc_lengths:
+                return  # ids are text hashes, so the content can't have changed
+            tokens = tokenize(text)
+            for term, tf in Counter(tokens).items():
+                self.postings[term][doc_id] = tf
+            self.doc_lengths[doc_id] = len(tokens)
+            self.texts[doc_id] = text
+            self.total_length += len(tokens)
+
+    def search(self, query, top_n=3):
+        """Return [(doc_id, score, coverage)] best first; coverage = share of query terms matched."""
+        terms = set(tokenize(query))
+        if not terms or not self.doc_lengths:
+            return []
+
+        with self.lock:
+            n = len(self.doc_lengths)
+            avg_len = self.total_length / n or 1.0
+            scores = defaultdict(float)
+            matched = defaultdict(int)
+            for term in terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_len)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+                    matched[doc_id] += 1
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_n]
+        return [(doc_id, score, matched[doc_id] / len(terms)) for doc_id, score in ranked]
+
+
+# === 🔀 Rank Fusion ===
+def reciprocal_rank_fusion(rankings, k=60):
+    """Merge ranked lists of ids into one list, best first."""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += 1.0 / (k + rank + 1)
+    return [doc_id for doc_id, _ in sorted(fused.items(), key=lambda x: x[1], reverse=True)]
+
+
+# === 🗂 Process-Wide Registry ===
+_indexes = {}
+_registry_lock = threading.Lock()
+
+
+def get_user_lexical_index(user_id, loader):
+    """Return the user's BM25 index, built once from loader(user_id) -> [(doc_id, text)]."""
+    index = _indexes.get(user_id)
+    if index is not None:
+        return index
+
+    index = BM25Index()
+    for doc_id, text in loader(user_id):
+        index.add(doc_id, text)
+    with _registry_lock:
+        return _indexes.setdefault(user_id, index)
+
+
+def get_loaded_lexical_index(user_id):
+    return _indexes.get(user_id)
+
+
+def drop_user_lexical_index(user_id):
+    with _registry_lock:
+        _indexes.pop(user_id, None)
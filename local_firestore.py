@@ -0,0 +1,307 @@
+# local_firestore.py
+import base64
+import copy
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from google.cloud import firestore
+from google.api_core.exceptions import NotFound
+
+
+# === 🔣 JSON Encoding (bytes / datetimes aren't JSON) ===
+def _default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unsupported field type: {type(value).__name__}")
+
+def _object_hook(obj):
+    if len(obj) == 1 and "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+def _dumps(data):
+    return json.dumps(data, default=_default)
+
+def _loads(text):
+    return json.loads(text, object_hook=_object_hook)
+
+def _json_path(field):
+    return "$." + ".".join(f'"{part}"' for part in field.split("."))
+
+
+# === 🔀 Firestore Write Semantics ===
+def _resolve(value, current):
+    if isinstance(value, firestore.ArrayUnion):
+        items = list(current) if isinstance(current, list) else []
+        items += [v for v in value.values if v not in items]
+        return items
+    if value is firestore.SERVER_TIMESTAMP:
+        return datetime.utcnow().isoformat()
+    return copy.deepcopy(value)
+
+def _merge(base, data):
+    # set(merge=True): nested maps merge, everything else replaces
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = _resolve(value, base.get(key))
+    return base
+
+def _update(base, data):
+    # update(): dotted keys address nested fields
+    for path, value in data.items():
+        *parents, leaf = path.split(".")
+        node = base
+        for part in parents:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        node[leaf] = _resolve(value, node.get(leaf))
+    return base
+
+def _project(data, fields):
+    out = {}
+    for path in fields:
+        *parents, leaf = path.split(".")
+        node = data
+        for part in parents:
+            node = node.get(part) if isinstance(node, dict) else None
+        if not isinstance(node, dict) or leaf not in node:
+            continue
+        target = out
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = node[leaf]
+    return out
+
+
+# === 🗄 SQLite Document Store ===
+class LocalFirestoreClient:
+    """
+    SQLite stand-in for the part of the Firestore client API that
+    firebase_client uses: document get/set/update/delete, batches, get_all,
+    and where/select/order_by/limit/start_after queries (no snapshot
+    listeners: watch_collection skips this backend). Each document is a
+    JSON row keyed by (collection path, doc id) and filters run through
+    JSON1, so merge and ArrayUnion behave like Firestore. One file per node;
+    for CI benchmarks and single-node installs.
+    """
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " collection TEXT NOT NULL, doc_id TEXT NOT NULL, data TEXT NOT NULL,"
+            " PRIMARY KEY (collection, doc_id)) WITHOUT ROWID"
+        )
+
+    def collection(self, path):
+        return LocalQuery(self, path)
+
+    def batch(self):
+        return LocalBatch(self)
+
+    def get_all(self, refs):
+        return [ref.get() for ref in refs]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # --- row access (callers hold self.lock) ---
+    def _read(self, collection, doc_id):
+        row = self.conn.execute(
+            "SELECT data FROM docs WHERE collection = ? AND doc_id = ?", (collection, doc_id)
+        ).fetchone()
+        return _loads(row[0]) if row else None
+
+    def _write(self, collection, doc_id, data):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO docs (collection, doc_id, data) VALUES (?, ?, ?)",
+            (collection, doc_id, _dumps(data))
+        )
+
+    def _apply(self, op, ref, data=None, merge=False):
+        current = self._read(ref.collection, ref.id)
+        if op == "delete":
+            self.conn.execute("DELETE FROM docs WHERE collection = ? AND doc_id = ?", (ref.collection, ref.id))
+        elif op == "update":
+            if current is None:
+                raise NotFound(f"No document to update: {ref.path}")
+            self._write(ref.collection, ref.id, _update(current, data))
+        else:
+            self._write(ref.collection, ref.id, _merge(current if merge and current else {}, data))
+
+    def _transaction(self, ops):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for op in ops:
+                    self._apply(*op)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+
+class LocalSnapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self.exists else None
+
+    def get(self, field):
+        node = self._data
+        for part in field.split("."):
+            node = node.get(part) if isinstance(node, dict) else None
+        return node
+
+
+class LocalDocumentRef:
+    def __init__(self, client, collection, doc_id):
+        self.client = client
+        self.collection = collection
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    def get(self, timeout=None):
+        with self.client.lock:
+            return LocalSnapshot(self, self.client._read(self.collection, self.id))
+
+    def set(self, data, merge=False):
+        self.client._transaction([("set", self, data, merge)])
+
+    def update(self, data):
+        self.client._transaction([("update", self, data)])
+
+    def delete(self):
+        self.client._transaction([("delete", self)])
+
+
+class LocalBatch:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append(("set", ref, data, merge))
+
+    def update(self, ref, data):
+        self.ops.append(("update", ref, data))
+
+    def delete(self, ref):
+        self.ops.append(("delete", ref))
+
+    def commit(self):
+        self.client._transaction(self.ops)
+        self.ops = []
+
+
+# === 🔍 Queries ===
+_OPS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+class LocalQuery:
+    """A collection reference doubles as an (unfiltered) query, as in Firestore."""
+
+    def __init__(self, client, collection, filters=(), fields=None, order=None, limit_to=None, cursor=None):
+        self.client = client
+        self.path = collection
+        self.filters = filters
+        self.fields = fields
+        self.order = order
+        self.limit_to = limit_to
+        self.cursor = cursor
+
+    def _copy(self, **changes):
+        state = dict(filters=self.filters, fields=self.fields, order=self.order,
+                     limit_to=self.limit_to, cursor=self.cursor)
+        state.update(changes)
+        return LocalQuery(self.client, self.path, **state)
+
+    def document(self, doc_id=None):
+        return LocalDocumentRef(self.client, self.path, doc_id or uuid.uuid4().hex[:20])
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self.filters + ((field_path, op_string, value),))
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def order_by(self, field_path, direction=firestore.Query.ASCENDING):
+        return self._copy(order=(field_path, direction == firestore.Query.DESCENDING))
+
+    def limit(self, count):
+        return self._copy(limit_to=count)
+
+    def start_after(self, snapshot):
+        return self._copy(cursor=snapshot)
+
+    def _sql(self):
+        clauses, params = ["collection = ?"], [self.path]
+        for field, op, value in self.filters:
+            path = _json_path(field)
+            if op in _OPS:
+                clauses.append(f"json_extract(data, ?) {_OPS[op]} ?")
+                params += [path, value]
+            elif op in ("in", "not-in"):
+                marks = ", ".join("?" for _ in value)
+                clauses.append(f"json_extract(data, ?) {'NOT IN' if op == 'not-in' else 'IN'} ({marks})")
+                params += [path, *value]
+            elif op in ("array_contains", "array-contains"):
+                clauses.append("EXISTS (SELECT 1 FROM json_each(data, ?) WHERE value = ?)")
+                params += [path, value]
+            else:
+                raise ValueError(f"Unsupported operator: {op}")
+
+        order_sql, order_params = "doc_id", []
+        if self.order:
+            field, descending = self.order
+            path = _json_path(field)
+            direction = "DESC" if descending else "ASC"
+            clauses.append("json_type(data, ?) IS NOT NULL")  # Firestore skips docs without the field
+            params.append(path)
+            order_sql, order_params = f"json_extract(data, ?) {direction}, doc_id {direction}", [path]
+            if self.cursor is not None:
+                cmp = "<" if descending else ">"
+                value = self.cursor.get(field)
+                clauses.append(f"(json_extract(data, ?) {cmp} ? OR (json_extract(data, ?) = ? AND doc_id {cmp} ?))")
+                params += [path, value, path, value, self.cursor.id]
+        elif self.cursor is not None:
+            clauses.append("doc_id > ?")
+            params.append(self.cursor.id)
+
+        sql = f"SELECT doc_id, data FROM docs WHERE {' AND '.join(clauses)} ORDER BY {order_sql}"
+        if self.limit_to:
+            sql += f" LIMIT {int(self.limit_to)}"
+        return sql, params + order_params
+
+    def stream(self, timeout=None):
+        sql, params = self._sql()
+        with self.client.lock:
+            rows = self.client.conn.execute(sql, params).fetchall()
+        for doc_id, text in rows:
+            data = _loads(text)
+            if self.fields is not None:
+                data = _project(data, self.fields)
+            yield LocalSnapshot(LocalDocumentRef(self.client, self.path, doc_id), data)
+
+    def get(self, timeout=None):
+        return list(self.stream())
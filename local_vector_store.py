@@ -0,0 +1,104 @@
+# local_vector_store.py
+import json
+import os
+import threading
+import numpy as np
+
+HEADER_SIZE = 128  # fixed .npy header length so the shape can be rewritten in place
+INITIAL_CAPACITY = 256
+
+
+# === 💾 Memory-Mapped Vector File ===
+class LocalVectorFile:
+    """
+    A user's normalized embeddings in user_data/{uid}/vectors.npy plus a
+    sidecar vectors_meta.jsonl. The .npy shape is the reserved capacity; the
+    metadata log decides which rows are live, so a row only counts once its
+    meta line has been written. Vector pages are left to the OS to write back —
+    this is a replica, Firestore stays the source of truth. Meant for one
+    writer process per node.
+    """
+
+    def __init__(self, user_id, dim, base_dir="user_data"):
+        self.user_id = user_id
+        self.dim = dim
+        self.dir = os.path.join(base_dir, user_id)
+        self.npy_path = os.path.join(self.dir, "vectors.npy")
+        self.meta_path = os.path.join(self.dir, "vectors_meta.jsonl")
+        self.generation_path = os.path.join(self.dir, "generation")
+        self.matrix = None
+        self.lock = threading.Lock()
+
+    # === 📖 Open / Grow ===
+    def open(self):
+        """Map the vector file (creating it if needed) and return the matrix."""
+        if not os.path.exists(self.npy_path):
+            self.grow(INITIAL_CAPACITY)
+        else:
+            self.matrix = np.load(self.npy_path, mmap_mode="r+")
+        return self.matrix
+
+    def grow(self, capacity):
+        """Extend the file to hold `capacity` rows and remap it."""
+        with self.lock:
+            os.makedirs(self.dir, exist_ok=True)
+            if self.matrix is not None:
+                self.matrix.flush()
+                self.matrix = None
+            mode = "r+b" if os.path.exists(self.npy_path) else "w+b"
+            with open(self.npy_path, mode) as f:
+                f.write(self._header(capacity))
+                f.truncate(HEADER_SIZE + capacity * self.dim * 4)
+            self.matrix = np.load(self.npy_path, mmap_mode="r+")
+            return self.matrix
+
+    def _header(self, rows):
+        header = repr({"descr": "<f4", "fortran_order": False, "shape": (rows, self.dim)})
+        prefix = b"\x93NUMPY\x01\x00"
+        body_len = HEADER_SIZE - len(prefix) - 2
+        body = header.ljust(body_len - 1).encode("latin1") + b"\n"
+        return prefix + body_len.to_bytes(2, "little") + body
+
+    # === 🧾 Metadata Log ===
+    def read_meta(self):
+        """Replay the metadata log into {row: entry}; later lines win."""
+        rows = {}
+        if not os.path.exists(self.meta_path):
+            return rows
+        with open(self.meta_path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line after a crash
+                rows[entry["row"]] = entry
+        return rows
+
+    def record(self, row, doc_id, text, source, created_at=None):
+        """Commit a row (already written into the map) with a metadata line."""
+        entry = {"row": row, "id": doc_id, "text": text, "source": source, "created_at": created_at}
+        with self.lock:
+            with open(self.meta_path, "a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+    # === 🔢 Generation (see vector_store.index_generation) ===
+    def read_generation(self):
+        """The index generation this replica was fully loaded at (None if it never finished)."""
+        try:
+            with open(self.generation_path, "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def write_generation(self, generation):
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self.generation_path, "w") as f:
+            f.write(str(generation))
+
+    def reset(self):
+        """Delete the replica files (the next open starts empty)."""
+        with self.lock:
+            self.matrix = None
+            for path in (self.npy_path, self.meta_path, self.generation_path):
+                if os.path.exists(path):
+                    os.remove(path)
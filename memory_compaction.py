@@ -0,0 +1,134 @@
+# memory_compaction.py
+import os
+import time
+from datetime import datetime
+import numpy as np
+import openai
+from dotenv import load_dotenv
+from firebase_client import query_docs, save_docs, delete_docs
+from vector_codec import decode_vector, encode_vector
+from retrieval_weights import to_epoch
+from vector_store import hash_text, user_vector_collection, bump_index_generation
+
+load_dotenv()
+client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+COMPACT_AFTER_DAYS = 60        # only memories older than this are clustered
+MIN_VECTORS_TO_COMPACT = 200   # don't bother below this many old memories
+VECTORS_PER_CLUSTER = 20       # target compression ratio
+SUMMARY_SAMPLE = 12            # member texts shown to the LLM per cluster
+
+
+def user_archive_collection(user_id):
+    return f"users/{user_id}/vectors_archive"
+
+
+# === 🧩 Mini-Batch K-Means (spherical) ===
+def minibatch_kmeans(vectors, k, batch_size=256, iterations=100, seed=0):
+    """
+    Cluster unit-length rows with mini-batch k-means, keeping
+    centroids normalized so assignment is a single matmul. Returns
+    (centroids, labels).
+    """
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    k = min(k, n)
+    centroids = vectors[rng.choice(n, k, replace=False)].copy()
+    counts = np.zeros(k, dtype=np.int64)
+
+    for _ in range(iterations):
+        batch = vectors[rng.choice(n, min(batch_size, n), replace=False)]
+        nearest = np.argmax(batch @ centroids.T, axis=1)
+        batch_counts = np.bincount(nearest, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, nearest, batch)
+        counts += batch_counts
+        hit = batch_counts > 0
+        # Per-centre learning rate 1/count, applied to the whole batch at once
+        centroids[hit] += (sums[hit] - batch_counts[hit, None] * centroids[hit]) / counts[hit, None]
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        centroids /= np.maximum(norms, 1e-12)
+
+    labels = np.argmax(vectors @ centroids.T, axis=1)
+    return centroids, labels
+
+
+# === 📝 Cluster Summaries ===
+def summarize_cluster(texts):
+    sample = "\n".join(f"- {t[:400]}" for t in texts[:SUMMARY_SAMPLE])
+    prompt = [
+        {"role": "system", "content": "You condense a person's old memories into one dense memory note."},
+        {"role": "user", "content": f"Write 2-3 sentences in first person capturing what these memories share "
+                                    f"(facts, feelings, recurring themes):\n\n{sample}"}
+    ]
+    try:
+        response = client.chat.completions.create(model="gpt-4o", messages=prompt, max_tokens=150)
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print("Cluster summary error:", e)
+        return " / ".join(t[:200] for t in texts[:3])
+
+
+# === 🗜 Compaction Job ===
+def compact_user_memories(user_id, older_than_days=COMPACT_AFTER_DAYS, dry_run=False):
+    """
+    Replace a user's old memories with one centroid memory per cluster.
+    Originals are copied to users/{uid}/vectors_archive before removal.
+    Old summaries are clustered too, so later runs fold them into
+    higher-level summaries and the live set stays roughly constant.
+    Returns a small report dict.
+    """
+    collection = user_vector_collection(user_id)
+    docs = query_docs(collection, include_id=True)
+    cutoff = time.time() - older_than_days * 86400
+
+    old = [
+        d for d in docs
+        if to_epoch(d.get("created_at")) < cutoff and decode_vector(d) is not None
+    ]
+    report = {"user_id": user_id, "total": len(docs), "old": len(old), "clusters": 0}
+    if len(old) < MIN_VECTORS_TO_COMPACT:
+        return report
+
+    vectors = np.stack([decode_vector(d).astype(np.float32) for d in old])
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    k = max(1, len(old) // VECTORS_PER_CLUSTER)
+    centroids, labels = minibatch_kmeans(vectors, k)
+
+    summaries = {}
+    replaced = []
+    for c in range(centroids.shape[0]):
+        members = np.flatnonzero(labels == c)
+        if members.size < 2:
+            continue  # a lone memory stays as it is
+        # Closest members first so the summary reflects the cluster's core
+        members = members[np.argsort(-(vectors[members] @ centroids[c]))]
+        texts = [old[i].get("text", "") for i in members]
+        newest = max(to_epoch(old[i].get("created_at")) for i in members)
+        summary = texts[0] if dry_run else summarize_cluster(texts)
+        summaries[hash_text(summary)] = {
+            "user_id": user_id,
+            **encode_vector(centroids[c]),
+            "text": summary,
+            "source": "summary",
+            "created_at": datetime.utcfromtimestamp(newest).isoformat() if newest else None,
+            "member_count": int(sum(old[i].get("member_count", 1) for i in members)),
+            "level": 1 + max(old[i].get("level", 0) for i in members),
+        }
+        replaced.extend(old[i] for i in members)
+
+    report["clusters"] = len(summaries)
+    if dry_run:
+        return report
+
+    archived = {d["id"]: {k: v for k, v in d.items() if k != "id"} for d in replaced}
+    if not save_docs(user_archive_collection(user_id), archived):
+        return report
+    if not save_docs(collection, summaries):
+        return report
+    delete_docs(collection, [d["id"] for d in replaced if d["id"] not in summaries])
+
+    # The app processes hold this user's indexes (and local replica); they
+    # rebuild them once they see the new generation
+    bump_index_generation(user_id)
+    return report
@@ -0,0 +1,124 @@
+# mood_engine.py
+import os
+import re
+import zlib
+import numpy as np
+
+# The one mood vocabulary used across the app (indicator, backgrounds, voice).
+# Order breaks ties, same priority as the old keyword checks.
+MOODS = ("neutral", "sad", "angry", "happy", "excited", "calm", "playful", "thoughtful")
+MOOD_INDEX = {mood: i for i, mood in enumerate(MOODS)}
+
+# Labels other code (or older data) may still produce
+MOOD_ALIASES = {"joyful": "happy", "energetic": "excited", "curious": "thoughtful"}
+
+MOOD_MODEL_PATH = os.getenv("MOOD_MODEL_PATH", "models/mood_model.npz")
+HASH_DIM = 1 << 18
+LEXICON_WEIGHT = 1.0
+MIN_MOOD_SCORE = 0.5  # below this the text reads as neutral
+
+# === 📖 Lexicon (matched on word boundaries, so "blueprint" isn't "blue") ===
+MOOD_LEXICON = {
+    "sad": ["sad", "tired", "lonely", "depressed", "cry", "crying", "cried", "blue", "heartbroken",
+            "miserable", "hopeless", "down bad", "exhausted", "hurts", "grief", "miss her", "miss him"],
+    "angry": ["angry", "annoyed", "pissed", "frustrated", "furious", "mad at", "hate", "sick of",
+              "fed up", "irritated", "livid"],
+    "happy": ["happy", "grateful", "glad", "joyful", "amazing", "love it"],
+    "excited": ["excited", "thrilled", "can't wait", "cant wait", "stoked", "hyped", "pumped"],
+    "calm": ["calm", "relaxed", "peaceful", "okay", "chill", "at peace", "serene"],
+    "playful": ["lol", "lmao", "haha", "hahaha", "jk", "just kidding", "lowkey", "silly", "tease"],
+    "thoughtful": ["wonder", "wondering", "thinking about", "reflect", "reflecting", "meaning of",
+                   "what if", "curious", "pondering", "perspective", "realize", "realized"],
+}
+
+_word_mood = {}
+for _mood, _words in MOOD_LEXICON.items():
+    for _word in _words:
+        _word_mood[_word] = MOOD_INDEX[_mood]
+# Longest first so phrases win over their own first word
+LEXICON_RE = re.compile(
+    r"(?<!\w)(?:" + "|".join(re.escape(w) for w in sorted(_word_mood, key=len, reverse=True)) + r")(?!\w)"
+)
+TOKEN_RE = re.compile(r"[a-z']+|[^\w\s]")
+
+
+def _prepare(text):
+    # Phones and editors type ’ for the apostrophe ("can’t wait")
+    return text.lower().replace("\u2019", "'")
+
+
+def normalize_mood(mood):
+    """Map any mood label onto MOODS (unknown labels become neutral)."""
+    mood = (mood or "neutral").strip().lower()
+    mood = MOOD_ALIASES.get(mood, mood)
+    return mood if mood in MOOD_INDEX else "neutral"
+
+# === #️⃣ Hashed N-gram Features ===
+def hashed_features(text):
+    """Bucket ids of the text's unigrams and bigrams (crc32, stable across runs)."""
+    tokens = TOKEN_RE.findall(_prepare(text))
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) % HASH_DIM for g in grams), dtype=np.int64, count=len(grams))
+
+# === 🧠 Linear Model (trained offline by scripts/train_mood_model.py) ===
+class MoodModel:
+    def __init__(self, weights, bias):
+        self.weights = weights  # (len(MOODS), HASH_DIM) float32
+        self.bias = bias
+
+    @classmethod
+    def load(cls, path=MOOD_MODEL_PATH):
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        if tuple(data["moods"]) != MOODS or data["weights"].shape[1] != HASH_DIM:
+            print(f"Mood model at {path} doesn't match this mood set, ignoring it")
+            return None
+        return cls(data["weights"].astype(np.float32), data["bias"].astype(np.float32))
+
+    def logits_many(self, feature_lists):
+        lengths = np.array([len(f) for f in feature_lists])
+        out = np.tile(self.bias, (len(feature_lists), 1))
+        if lengths.sum() == 0:
+            return out
+        flat = np.concatenate(feature_lists)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        nonempty = lengths > 0
+        sums = np.add.reduceat(self.weights[:, flat], starts[nonempty], axis=1)
+        out[nonempty] += sums.T
+        return out
+
+_model = MoodModel.load()
+
+# === 🎯 Scoring ===
+def lexicon_scores(text):
+    scores = np.zeros(len(MOODS), dtype=np.float32)
+    for match in LEXICON_RE.finditer(_prepare(text)):
+        scores[_word_mood[match.group(0)]] += 1.0
+    return scores
+
+def mood_scores_many(texts):
+    """(len(texts), len(MOODS)) scores: lexicon hits plus the model's logits if one is trained."""
+    scores = np.stack([lexicon_scores(t) for t in texts]) * LEXICON_WEIGHT if texts else np.zeros((0, len(MOODS)))
+    if _model is not None and texts:
+        scores = scores + _model.logits_many([hashed_features(t) for t in texts])
+    return scores
+
+def detect_moods(texts):
+    """Mood label for each text — e.g. a whole chat history in one call."""
+    scores = mood_scores_many(list(texts))
+    scores[:, MOOD_INDEX["neutral"]] = np.maximum(scores[:, MOOD_INDEX["neutral"]], MIN_MOOD_SCORE)
+    return [MOODS[i] for i in np.argmax(scores, axis=1)]
+
+def detect_mood(text):
+    """Mood label for one text; neutral when nothing clears MIN_MOOD_SCORE."""
+    if not text:
+        return "neutral"
+    if _model is not None:
+        return detect_moods([text])[0]
+    # Lexicon only: plain counting beats numpy's per-call overhead for one short text
+    counts = [0] * len(MOODS)
+    for match in LEXICON_RE.finditer(_prepare(text)):
+        counts[_word_mood[match.group(0)]] += 1
+    best = max(range(len(MOODS)), key=counts.__getitem__)
+    return MOODS[best] if counts[best] * LEXICON_WEIGHT >= MIN_MOOD_SCORE else "neutral"
@@ -1,5 +1,5 @@
 import streamlit as st
-from firebase_client import get_all_docs
+from firebase_client import iter_docs
 import pandas as pd
 
 st.set_page_config(page_title="🛠 Admin Feedback Viewer", page_icon="📬")
@@ -7,8 +7,13 @@ st.title("🛠 Feedback Viewer")
 
 st.markdown("Here are the latest user-submitted feedback messages.")
 
-# Load all feedback entries
-entries = get_all_docs("feedback")
+# Load all feedback entries (paged reads, only the fields shown below)
+FEEDBACK_FIELDS = ["type", "timestamp", "user_id", "page", "message", "device"]
+try:
+    entries = list(iter_docs("feedback", select=FEEDBACK_FIELDS))
+except Exception as e:
+    st.error(f"❌ Error loading feedback: {str(e)}")
+    st.stop()
 
 if not entries:
     st.info("No feedback submitted yet.")
@@ -1,9 +1,11 @@
 import streamlit as st
 import matplotlib.pyplot as plt
 from dotenv import load_dotenv
-from firebase_client import get_doc, save_doc, get_all_docs
+from firebase_client import get_docs, save_doc
 from datetime import datetime
 from components.feedback_button import feedback_button
+from components.paginator import paginated_docs
+from components.firestore_debug import firestore_debug_panel
 
 # Set page config first (must be the first Streamlit command)
 st.set_page_config(page_title="MirrorMe - Feed", page_icon="��")
@@ -23,12 +25,16 @@ feedback_button(user_id)
 
 st.title("🌍 Explore Public Mirrors")
 
-mirrors = get_all_docs("public_mirrors")
+FEED_PAGE_SIZE = 20
+mirrors = paginated_docs("feed", "public_mirrors", page_size=FEED_PAGE_SIZE)
 current_user = st.session_state.get("user", {}).get("localId")
 
 if not mirrors:
     st.info("No public mirrors yet. Encourage others to share their minds!")
 else:
+    # One batched read for every mirror's comments instead of one per mirror
+    all_comments = get_docs("comments", [m["user_id"] for m in mirrors if m.get("user_id")])
+
     for mirror in mirrors:
         user_id = mirror.get("user_id")
         if not user_id:
@@ -43,8 +49,7 @@ else:
             st.progress(score / 100.0, text=f"{trait.title()}: {score}")
 
         with st.expander("💬 Comments"):
-            comment_path = f"comments/{user_id}"
-            comment_doc = get_doc("comments", user_id) or {}
+            comment_doc = all_comments.get(user_id) or {}
             comments = comment_doc.get("entries", [])
 
             for c in comments[-5:]:
@@ -72,3 +77,5 @@ else:
         if st.button(f"🗣 Talk to this Mirror", key=f"talk_{user_id}"):
             st.session_state["sandbox_target"] = user_id
             st.switch_page("pages/Sandbox.py")
+
+firestore_debug_panel()
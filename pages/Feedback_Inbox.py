@@ -1,5 +1,5 @@
 import streamlit as st
-from firebase_client import get_all_docs
+from firebase_client import iter_docs
 import datetime
 
 # === SET YOUR ADMIN EMAIL HERE ===
@@ -18,14 +18,19 @@ st.title("📬 Feedback Inbox")
 st.caption("Only visible to the admin.")
 
 # === LOAD FEEDBACK ===
-feedback_logs = get_all_docs("feedback_logs")
-
-if not feedback_logs:
-    st.info("No feedback yet.")
-else:
-    for user_id, doc in feedback_logs.items():
-        st.markdown(f"### 🧑 From: `{user_id}`")
+# Streamed page by page, so the first users show up before the scan finishes
+shown = 0
+try:
+    for doc in iter_docs("feedback_logs", include_id=True):
+        shown += 1
+        st.markdown(f"### 🧑 From: `{doc['id']}`")
         for entry in doc.get("entries", []):
             st.markdown(f"- 🕒 `{entry.get('timestamp', 'N/A')}`")
             st.code(entry.get("error", 'No error provided.'))
         st.markdown("---")
+except Exception as e:
+    st.error(f"❌ Error loading feedback (showing the first {shown}): {str(e)}")
+    st.stop()
+
+if not shown:
+    st.info("No feedback yet.")
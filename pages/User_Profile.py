@@ -6,6 +6,7 @@ from long_memory import load_long_memory
 from clarity_core import load_clarity, save_clarity
 from firebase_client import save_doc, delete_doc
 from components.feedback_button import feedback_button
+from components.firestore_debug import firestore_debug_panel
 
 
 st.set_page_config(page_title="User Profile", page_icon="👤")
@@ -113,4 +114,6 @@ if public_toggle != clarity.get("public"):
 st.subheader("🔊 Voice Preferences")
 st.markdown(f"- **Voice ID:** `{settings.get('voice_id')}`")
 st.markdown(f"- **Voice Response Enabled:** `{settings.get('enable_voice_response')}`")
-feedback_button(user_id)
\ No newline at end of file
+feedback_button(user_id)
+
+firestore_debug_panel()
@@ -0,0 +1,151 @@
+# prompt_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import openai
+from dotenv import load_dotenv
+from prompt_builder import CHAT_MODEL, STATIC_PREFIX, MESSAGE_OVERHEAD, count_tokens
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    get_script_run_ctx = None
+
+load_dotenv()
+client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Appended to with one JSON line per chat request when set
+PROMPT_CACHE_LOG = os.getenv("PROMPT_CACHE_LOG")
+# OpenAI only caches prompts of at least this many tokens, and only on
+# gpt-4o-class models; with other models cached_tokens is always 0
+CACHE_MIN_TOKENS = 1024
+# Changes whenever the static prefix does — a new value means a cold cache after deploy
+STATIC_PREFIX_HASH = hashlib.sha256(STATIC_PREFIX.encode("utf-8")).hexdigest()[:12]
+SESSION_KEY = "_prompt_cache"
+
+
+# === 🔁 Prefix Reuse ===
+def shared_prefix_tokens(previous, messages):
+    """Tokens of leading messages identical to the previous request's (whole messages only)."""
+    tokens = 0
+    for before, now in zip(previous, messages):
+        if before != now:
+            break
+        tokens += count_tokens(now["content"]) + MESSAGE_OVERHEAD
+    return tokens
+
+def _session():
+    if get_script_run_ctx is None or get_script_run_ctx() is None:
+        return None
+    import streamlit as st
+    return st.session_state.setdefault(SESSION_KEY, {"last_messages": [], "requests": []})
+
+
+# === 📊 Telemetry ===
+class PromptCacheStats:
+    """
+    Process-wide tally of chat requests: prompt vs cached tokens as reported
+    by the provider, and time to first token split by cache hit / miss.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.ttft = {"hit": [0, 0.0], "miss": [0, 0.0]}  # [count, seconds]
+
+    def record(self, row):
+        with self.lock:
+            self.requests += 1
+            self.hits += int(row["cached_tokens"] > 0)
+            self.prompt_tokens += row["prompt_tokens"]
+            self.cached_tokens += row["cached_tokens"]
+            if row["ttft_ms"] is not None:
+                slot = self.ttft["hit" if row["cached_tokens"] else "miss"]
+                slot[0] += 1
+                slot[1] += row["ttft_ms"] / 1000
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "hit_rate": self.hits / self.requests if self.requests else 0.0,
+                "cached_share": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+                "ttft_hit_ms": 1000 * self.ttft["hit"][1] / self.ttft["hit"][0] if self.ttft["hit"][0] else None,
+                "ttft_miss_ms": 1000 * self.ttft["miss"][1] / self.ttft["miss"][0] if self.ttft["miss"][0] else None,
+            }
+
+cache_stats = PromptCacheStats()
+
+def _log(row):
+    if not PROMPT_CACHE_LOG:
+        return
+    try:
+        if os.path.dirname(PROMPT_CACHE_LOG):
+            os.makedirs(os.path.dirname(PROMPT_CACHE_LOG), exist_ok=True)
+        with open(PROMPT_CACHE_LOG, "a") as f:
+            f.write(json.dumps(row) + "\n")
+    except OSError as e:
+        print(f"Error writing prompt cache log: {e}")
+
+
+# === 💬 Cache-Aware Chat Request ===
+def stream_chat(messages, model=CHAT_MODEL, max_tokens=150):
+    """
+    Start a streamed chat completion and return a generator of text pieces.
+    When the stream ends, the request is recorded: prompt and cached tokens
+    from the provider's usage block, time to first token, and how many
+    leading tokens matched the session's previous request (what the cache
+    could have reused). Errors starting the request are raised here.
+    """
+    session = _session()
+    expected_reuse = shared_prefix_tokens(session["last_messages"], messages) if session else 0
+    start = time.perf_counter()
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True}  # usage arrives on the final, choice-less chunk
+    )
+    return _relay(response, messages, model, start, expected_reuse, session)
+
+def _relay(response, messages, model, start, expected_reuse, session):
+    ttft, usage = None, None
+    for chunk in response:
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            yield chunk.choices[0].delta.content
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    row = {
+        "time": datetime.utcnow().isoformat(),
+        "model": model,
+        "prefix_hash": STATIC_PREFIX_HASH,
+        "prompt_tokens": usage.prompt_tokens if usage else 0,
+        "cached_tokens": (getattr(details, "cached_tokens", 0) or 0) if details else 0,
+        "expected_reuse": expected_reuse,
+        "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+        "total_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    cache_stats.record(row)
+    _log(row)
+    if session is not None:
+        session["last_messages"] = messages
+        session["requests"] = (session["requests"] + [row])[-20:]
+
+def recent_requests():
+    """This session's last (up to 20) chat request rows, oldest first."""
+    session = _session()
+    return list(session["requests"]) if session else []
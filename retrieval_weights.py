@@ -0,0 +1,50 @@
+# retrieval_weights.py
+import json
+import os
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+# A memory loses half of its recency boost every RECENCY_HALF_LIFE_DAYS,
+# but never drops below RECENCY_FLOOR of its similarity.
+RECENCY_HALF_LIFE_DAYS = float(os.getenv("RECENCY_HALF_LIFE_DAYS", "90"))
+RECENCY_FLOOR = float(os.getenv("RECENCY_FLOOR", "0.6"))
+SOURCE_WEIGHTS = {"journal": 1.15, "chat": 1.0, "summary": 1.05}
+SOURCE_WEIGHTS.update(json.loads(os.getenv("SOURCE_WEIGHTS", "{}")))
+
+
+# === 🕰 Timestamps ===
+def to_epoch(value):
+    """Seconds since the epoch for an ISO string, datetime or number; 0 if unknown."""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return 0.0
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)  # stored with datetime.utcnow()
+        return value.timestamp()
+    return 0.0
+
+
+# === ⚖️ Weight Array ===
+def memory_weights(timestamps, source_weights, now=None):
+    """
+    One weight per memory: source weight x recency decay. Vectorized so it can
+    sit next to the embedding matrix and be applied as a single multiply.
+    Memories with no timestamp (legacy docs) get the floor.
+    """
+    now = time.time() if now is None else now
+    age_days = np.maximum(now - np.asarray(timestamps, dtype=np.float64), 0) / 86400
+    decay = np.exp2(-age_days / RECENCY_HALF_LIFE_DAYS)
+    recency = RECENCY_FLOOR + (1 - RECENCY_FLOOR) * decay
+    return (np.asarray(source_weights, dtype=np.float32) * recency).astype(np.float32)
+
+
+def source_weight(source):
+    return SOURCE_WEIGHTS.get(source, 1.0)
@@ -0,0 +1,54 @@
+# scripts/backfill_vectors.py
+"""
+Embed a user's existing journals and chat history in bulk.
+
+    python scripts/backfill_vectors.py <user_id>
+    python scripts/backfill_vectors.py <user_id> --journals-only
+
+Journals come from user_journals/{uid}/*.txt, chat turns from
+users/{uid}/chat_turns (plus any history not yet migrated out of memories/{uid}).
+Texts the user already has vectors for are skipped, and embeddings come from
+the local cache when available, so re-running is cheap.
+"""
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from user_memory import iter_turns  # noqa: E402
+from vector_index import get_user_index  # noqa: E402
+from vector_store import load_user_vectors, store_vectors  # noqa: E402
+
+
+def load_journal_texts(user_id):
+    texts = []
+    for path in sorted(glob.glob(f"user_journals/{user_id}/*.txt")):
+        with open(path, "r") as f:
+            texts.append(f.read())
+    return texts
+
+
+def load_chat_texts(user_id):
+    return [turn["user"] for turn in iter_turns(user_id) if turn.get("user")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-embed a user's journals and chat history")
+    parser.add_argument("user_id")
+    parser.add_argument("--journals-only", action="store_true")
+    parser.add_argument("--chat-only", action="store_true")
+    args = parser.parse_args()
+
+    # Loading the index lets store_vectors skip texts that are already stored
+    get_user_index(args.user_id, load_user_vectors)
+
+    if not args.chat_only:
+        journals = load_journal_texts(args.user_id)
+        stored = store_vectors(args.user_id, journals, source="journal")
+        print(f"📓 Journals: {stored} new vectors from {len(journals)} entries")
+
+    if not args.journals_only:
+        chats = load_chat_texts(args.user_id)
+        stored = store_vectors(args.user_id, chats, source="chat")
+        print(f"💬 Chat: {stored} new vectors from {len(chats)} messages")
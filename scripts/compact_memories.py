@@ -0,0 +1,30 @@
+# scripts/compact_memories.py
+"""
+Cluster and summarize old memories for one or more users.
+
+    python scripts/compact_memories.py <user_id> [<user_id> ...] --dry-run
+    python scripts/compact_memories.py <user_id> --older-than 90
+
+Run it offline (cron or by hand); each cluster costs one GPT-4o call.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from memory_compaction import compact_user_memories, COMPACT_AFTER_DAYS  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact old memory vectors into cluster summaries")
+    parser.add_argument("user_ids", nargs="+")
+    parser.add_argument("--older-than", type=int, default=COMPACT_AFTER_DAYS, help="age in days")
+    parser.add_argument("--dry-run", action="store_true", help="cluster and report without writing")
+    args = parser.parse_args()
+
+    for user_id in args.user_ids:
+        report = compact_user_memories(user_id, older_than_days=args.older_than, dry_run=args.dry_run)
+        if report["clusters"]:
+            print(f"🗜 {user_id}: {report['old']} old of {report['total']} → {report['clusters']} summaries")
+        else:
+            print(f"⏭ {user_id}: {report['old']} old of {report['total']}, nothing to compact")
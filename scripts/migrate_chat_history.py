@@ -0,0 +1,70 @@
+# scripts/migrate_chat_history.py
+"""
+Move chat history arrays (memories/{uid}.history) into per-turn docs
+(users/{uid}/chat_turns/{turn_id}).
+
+    python scripts/migrate_chat_history.py --dry-run
+    python scripts/migrate_chat_history.py --delete
+
+Legacy turns have no timestamps, so they get ts = their position in the
+array, which sorts them before every turn written since. Safe to re-run:
+turn ids are derived from that position. memories/{uid} is only removed
+with --delete; otherwise it is marked history_migrated so the readers in
+user_memory stop merging the old array in (which would duplicate turns).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from firebase_client import init_firestore  # noqa: E402
+from user_memory import user_turns_collection  # noqa: E402
+
+BATCH_SIZE = 450  # Firestore allows 500 writes per batch
+
+
+def migrate(delete=False, dry_run=False):
+    db = init_firestore()
+    if db is None:
+        print("❌ Could not connect to Firestore")
+        return
+
+    moved = 0
+    users = 0
+    for doc in db.collection("memories").stream():
+        data = doc.to_dict() or {}
+        if data.get("history_migrated") and not delete:
+            continue
+        history = data.get("history", [])
+        users += 1
+        moved += len(history)
+        if dry_run:
+            continue
+
+        turns = db.collection(user_turns_collection(doc.id))
+        for start in range(0, len(history), BATCH_SIZE):
+            batch = db.batch()
+            for i, turn in enumerate(history[start:start + BATCH_SIZE], start):
+                batch.set(turns.document(f"{i:013d}-legacy"), {
+                    "user": turn.get("user", ""),
+                    "assistant": turn.get("assistant", ""),
+                    "ts": float(i),
+                    "created_at": None
+                })
+            batch.commit()
+        if delete:
+            doc.reference.delete()
+        else:
+            doc.reference.update({"history_migrated": True})
+        print(f"… {doc.id}: {len(history)} turns")
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"✅ {action} {moved} turns for {users} users")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move memories/{uid}.history into users/{uid}/chat_turns")
+    parser.add_argument("--delete", action="store_true", help="remove memories/{uid} after copying")
+    parser.add_argument("--dry-run", action="store_true", help="count turns without writing")
+    args = parser.parse_args()
+    migrate(delete=args.delete, dry_run=args.dry_run)
@@ -0,0 +1,86 @@
+# scripts/migrate_vectors.py
+"""
+Move legacy flat vector docs (vectors/{uid}_{hash}) into per-user
+subcollections (users/{uid}/vectors/{hash}).
+
+    python scripts/migrate_vectors.py --dry-run
+    python scripts/migrate_vectors.py --delete
+
+Safe to re-run: targets are keyed by the text hash, so copies just overwrite.
+Originals are only removed with --delete.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from firebase_client import init_firestore  # noqa: E402
+from vector_store import hash_text, user_vector_collection, bump_index_generation  # noqa: E402
+
+BATCH_SIZE = 400  # Firestore allows 500 writes per batch; copy + delete = 2 per doc when deleting
+
+
+def split_legacy_id(doc_id, data):
+    """Return (user_id, vector_id) for a legacy doc."""
+    user_id = data.get("user_id")
+    if user_id and doc_id.startswith(f"{user_id}_"):
+        return user_id, doc_id[len(user_id) + 1:]
+    if user_id:
+        return user_id, hash_text(data.get("text", ""))
+    user_id, _, vector_id = doc_id.rpartition("_")
+    return user_id, vector_id
+
+
+def migrate(delete=False, dry_run=False):
+    db = init_firestore()
+    if db is None:
+        print("❌ Could not connect to Firestore")
+        return
+
+    per_batch = BATCH_SIZE // 2 if delete else BATCH_SIZE
+    batch = db.batch()
+    pending = 0
+    moved = 0
+    users = set()
+
+    for doc in db.collection("vectors").stream():
+        data = doc.to_dict()
+        user_id, vector_id = split_legacy_id(doc.id, data)
+        if not user_id or not vector_id:
+            print(f"⚠️ Skipping {doc.id}: can't determine owner")
+            continue
+
+        users.add(user_id)
+        moved += 1
+        if dry_run:
+            continue
+
+        target = db.collection(user_vector_collection(user_id)).document(vector_id)
+        batch.set(target, data, merge=True)
+        if delete:
+            batch.delete(doc.reference)
+        pending += 1
+
+        if pending >= per_batch:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+            print(f"… {moved} docs migrated")
+
+    if pending:
+        batch.commit()
+    if not dry_run:
+        # Running app processes rebuild these users' indexes and replicas
+        for user_id in users:
+            bump_index_generation(user_id)
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"✅ {action} {moved} vectors for {len(users)} users")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move vectors into users/{uid}/vectors")
+    parser.add_argument("--delete", action="store_true", help="remove the legacy docs after copying")
+    parser.add_argument("--dry-run", action="store_true", help="count docs without writing")
+    args = parser.parse_args()
+    migrate(delete=args.delete, dry_run=args.dry_run)
@@ -0,0 +1,91 @@
+# scripts/train_mood_model.py
+"""
+Train the hashed n-gram mood model used by mood_engine.
+
+    python scripts/train_mood_model.py labeled.jsonl
+    python scripts/train_mood_model.py labeled.jsonl --epochs 30 --out models/mood_model.npz
+
+Input is JSONL with {"text": ..., "mood": ...}; moods are normalized onto
+mood_engine.MOODS. Multinomial logistic regression with L2, trained with
+mini-batch gradient descent in numpy. The engine keeps working from the
+lexicon alone until a model file exists.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mood_engine import MOODS, MOOD_INDEX, HASH_DIM, MOOD_MODEL_PATH, hashed_features, normalize_mood  # noqa: E402
+
+
+def load_examples(path):
+    features, labels = [], []
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            features.append(hashed_features(row["text"]))
+            labels.append(MOOD_INDEX[normalize_mood(row.get("mood"))])
+    return features, np.array(labels)
+
+
+def train(features, labels, epochs=20, lr=0.5, l2=1e-5, batch_size=256, seed=0):
+    rng = np.random.default_rng(seed)
+    k = len(MOODS)
+    weights = np.zeros((k, HASH_DIM), dtype=np.float32)
+    bias = np.zeros(k, dtype=np.float32)
+    n = len(features)
+
+    for epoch in range(epochs):
+        order = rng.permutation(n)
+        loss = 0.0
+        for start in range(0, n, batch_size):
+            batch = order[start:start + batch_size]
+            logits = np.stack([weights[:, features[i]].sum(axis=1) for i in batch]) + bias
+            logits -= logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            loss -= np.log(probs[np.arange(len(batch)), labels[batch]] + 1e-12).sum()
+
+            grad = probs
+            grad[np.arange(len(batch)), labels[batch]] -= 1.0
+            grad /= len(batch)
+            bias -= lr * grad.sum(axis=0)
+            for row, i in enumerate(batch):
+                np.add.at(weights.T, features[i], -lr * grad[row])
+            weights *= (1 - lr * l2)
+        print(f"epoch {epoch + 1}: loss {loss / n:.4f}")
+    return weights, bias
+
+
+def accuracy(features, labels, weights, bias):
+    logits = np.stack([weights[:, f].sum(axis=1) for f in features]) + bias
+    return float((logits.argmax(axis=1) == labels).mean())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram mood model")
+    parser.add_argument("data", help="JSONL of {text, mood}")
+    parser.add_argument("--out", default=MOOD_MODEL_PATH)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--holdout", type=float, default=0.1, help="share of examples kept for evaluation")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the holdout shuffle and batch order")
+    args = parser.parse_args()
+
+    features, labels = load_examples(args.data)
+    # Shuffle before splitting so a file sorted by mood (or source) doesn't leave whole moods out of the holdout
+    order = np.random.default_rng(args.seed).permutation(len(features))
+    features, labels = [features[i] for i in order], labels[order]
+    split = int(len(features) * (1 - args.holdout))
+    weights, bias = train(features[:split], labels[:split], epochs=args.epochs, seed=args.seed)
+    if split < len(features):
+        print(f"🎯 Holdout accuracy: {accuracy(features[split:], labels[split:], weights, bias):.3f}")
+
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    np.savez_compressed(args.out, weights=weights, bias=bias, moods=np.array(MOODS))
+    print(f"✅ Saved {args.out}")
@@ -1,11 +1,21 @@
 # style_analyzer.py
 import openai
 import os
+import re
+import threading
+import time
 from dotenv import load_dotenv
+from firebase_client import get_doc, save_doc
 
 load_dotenv()
 client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Re-describe the style with the LLM only once the features move this far
+STYLE_DRIFT_THRESHOLD = float(os.getenv("STYLE_DRIFT_THRESHOLD", "0.25"))
+STYLE_EMA_ALPHA = 0.15      # weight of each new message once warmed up
+STYLE_MIN_MESSAGES = 3      # messages needed before the profile is trusted
+STYLE_TIMEOUT = float(os.getenv("STYLE_TIMEOUT", "4"))  # seconds per GPT-4o request
+
 def analyze_user_style(user_messages):
     if not user_messages:
         return "neutral and default"
@@ -20,8 +30,110 @@ def analyze_user_style(user_messages):
         response = client.chat.completions.create(
             model="gpt-4o",
             messages=prompt,
-            max_tokens=100
+            max_tokens=100,
+            timeout=STYLE_TIMEOUT
         )
         return response.choices[0].message.content.strip()
     except Exception as e:
         return "neutral and default"
+
+# === 📐 Local Style Features ===
+SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?\n]*")
+WORD_RE = re.compile(r"[A-Za-z']+")
+EMOJI_RE = re.compile("[\U0001F300-\U0001FAFF☀-➿\U0001F000-\U0001F2FF]")
+
+# Typical spread of each feature, so drift is comparable across them
+FEATURE_SCALES = {
+    "sentence_words": 10.0,
+    "word_length": 1.5,
+    "question_rate": 0.5,
+    "exclaim_rate": 0.5,
+    "ellipsis_rate": 0.3,
+    "emoji_rate": 0.1,
+    "lexical_diversity": 0.3,
+    "caps_rate": 0.1,
+    "lowercase_starts": 0.5,
+}
+
+def style_features(text):
+    """Cheap per-message style features (rates are per sentence or per word)."""
+    sentences = [s for s in SENTENCE_RE.findall(text) if s.strip()] or [text]
+    words = WORD_RE.findall(text)
+    n_words = max(len(words), 1)
+    n_sentences = len(sentences)
+    letters = [c for c in text if c.isalpha()]
+    return {
+        "sentence_words": len(words) / n_sentences,
+        "word_length": sum(len(w) for w in words) / n_words,
+        "question_rate": text.count("?") / n_sentences,
+        "exclaim_rate": text.count("!") / n_sentences,
+        "ellipsis_rate": (text.count("...") + text.count("…")) / n_sentences,
+        "emoji_rate": len(EMOJI_RE.findall(text)) / n_words,
+        "lexical_diversity": len({w.lower() for w in words}) / n_words,
+        "caps_rate": sum(c.isupper() for c in letters) / max(len(letters), 1),
+        "lowercase_starts": sum(s.strip()[0].islower() for s in sentences) / n_sentences,
+    }
+
+def style_drift(current, reference):
+    """Mean scaled distance between two feature dicts (0 = identical)."""
+    if not reference:
+        return float("inf")
+    return sum(
+        min(abs(current.get(k, 0.0) - reference.get(k, 0.0)) / scale, 1.0)
+        for k, scale in FEATURE_SCALES.items()
+    ) / len(FEATURE_SCALES)
+
+# === 🧬 Persistent Style Profile (style_profiles/{uid}) ===
+# Running averages shared by every session in this process, so two tabs
+# add to the same profile; the doc is read once and only written deferred
+_profiles = {}  # user_id -> {"features": {...}, "count": n}
+_profiles_lock = threading.Lock()
+
+def update_style_profile(user_id, message):
+    """Fold one new user message into the running feature averages."""
+    if not message or not message.strip():
+        return
+    new_features = style_features(message)
+    if user_id not in _profiles:
+        stored = get_doc("style_profiles", user_id) or {}
+        with _profiles_lock:
+            _profiles.setdefault(user_id, {
+                "features": dict(stored.get("features", {})),
+                "count": stored.get("count", 0)
+            })
+    with _profiles_lock:
+        profile = _profiles[user_id]
+        profile["count"] += 1
+        # Plain mean while warming up, then an exponential moving average
+        alpha = max(1.0 / profile["count"], STYLE_EMA_ALPHA)
+        features = profile["features"]
+        for key, value in new_features.items():
+            features[key] = features.get(key, value) * (1 - alpha) + value * alpha
+        update = {"features": dict(features), "count": profile["count"]}
+    save_doc("style_profiles", user_id, update, defer=True)
+
+def get_user_style(user_id, recent_messages=None):
+    """
+    The user's writing-style description. The cached LLM description is
+    reused until the local features drift past STYLE_DRIFT_THRESHOLD from
+    the ones it was written for; only then is GPT-4o asked again.
+    """
+    profile = get_doc("style_profiles", user_id) or {}
+    description = profile.get("description")
+    features = profile.get("features", {})
+    if description and (
+        profile.get("count", 0) < STYLE_MIN_MESSAGES
+        or style_drift(features, profile.get("described_features")) < STYLE_DRIFT_THRESHOLD
+    ):
+        return description
+    if not recent_messages:
+        return description or "balanced"
+
+    description = analyze_user_style(recent_messages)
+    if description != "neutral and default":
+        save_doc("style_profiles", user_id, {
+            "description": description,
+            "described_features": features,
+            "described_at": time.time()
+        }, defer=True)
+    return description
@@ -1,33 +1,106 @@
 # user_memory.py
-from firebase_client import get_doc, save_doc
+from firebase_client import get_doc, save_doc, query_docs, iter_docs
 import openai
 from dotenv import load_dotenv
 import os
 import json
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+import streamlit as st
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    get_script_run_ctx = None
 
 load_dotenv()
 client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+RECENT_TURNS_BUFFER = 20  # turns each Streamlit session keeps in memory
+
 # === 🧠 Memory Logging ===
-def update_user_memory(user_id, user_input, assistant_reply):
+# Each turn is its own doc in users/{uid}/chat_turns, ordered by "ts": a new
+# message is one insert (no read, no whole-array rewrite, no 1 MiB ceiling)
+# and reads fetch only the tail. Histories not yet moved by
+# scripts/migrate_chat_history.py still sit in memories/{uid}.history.
+def user_turns_collection(user_id):
+    return f"users/{user_id}/chat_turns"
+
+def update_user_memory(user_id, user_input, assistant_reply, defer=False):
+    now = time.time()
+    # Millisecond prefix keeps ids in time order; the suffix keeps two tabs from colliding
+    turn_id = f"{int(now * 1000):013d}-{uuid.uuid4().hex[:8]}"
+    save_doc(user_turns_collection(user_id), turn_id, {
+        "user": user_input,
+        "assistant": assistant_reply,
+        "ts": now,
+        "created_at": datetime.utcfromtimestamp(now).isoformat()
+    }, defer=defer)
+    buffer = _session_buffer(user_id)
+    if buffer is not None and buffer["loaded"]:
+        buffer["turns"].append({"user": user_input, "assistant": assistant_reply})
+
+def read_turn_tail(user_id, n):
+    """The user's last n turns, oldest first."""
+    turns = query_docs(user_turns_collection(user_id), order_by="ts", descending=True, limit=n)
+    turns.reverse()
+    if len(turns) < n:
+        legacy = _legacy_history(user_id)
+        turns = legacy[max(len(legacy) - (n - len(turns)), 0):] + turns
+    return turns
+
+def _legacy_history(user_id):
+    # Only histories the migration hasn't copied yet; it marks the ones it has
     doc = get_doc("memories", user_id) or {}
-    history = doc.get("history", [])
-    history.append({"user": user_input, "assistant": assistant_reply})
-    save_doc("memories", user_id, {"history": history})
+    return [] if doc.get("history_migrated") else doc.get("history", [])
+
+# === ⏱ Recent Turns (per-session ring buffer) ===
+def _session_buffer(user_id):
+    if get_script_run_ctx is None or get_script_run_ctx() is None:
+        return None
+    key = f"_recent_turns_{user_id}"
+    if key not in st.session_state:
+        st.session_state[key] = {"turns": deque(maxlen=RECENT_TURNS_BUFFER), "loaded": False}
+    return st.session_state[key]
+
+def get_recent_turns(user_id, n):
+    """
+    The user's last n turns, oldest first. Inside a Streamlit session the
+    tail is read once into a ring buffer that update_user_memory keeps
+    current, so reruns don't query at all; n beyond the buffer (or code
+    outside Streamlit) goes to the tail query.
+    """
+    buffer = _session_buffer(user_id)
+    if buffer is None or n > RECENT_TURNS_BUFFER:
+        return read_turn_tail(user_id, n)
+    if not buffer["loaded"]:
+        turns = read_turn_tail(user_id, RECENT_TURNS_BUFFER)
+        buffer["turns"].extend(turns)
+        buffer["loaded"] = True
+    return list(buffer["turns"])[-n:] if n > 0 else []
+
+def iter_turns(user_id):
+    """Every turn, oldest first (for backfills and exports)."""
+    yield from _legacy_history(user_id)
+    yield from iter_docs(user_turns_collection(user_id), order_by="ts")
+
+def format_turns(turns):
+    return "\n".join([f"You: {m['user']}\nMirrorMe: {m['assistant']}" for m in turns])
 
 def get_user_memory_as_string(user_id):
-    doc = get_doc("memories", user_id)
-    if not doc or "history" not in doc:
+    turns = get_recent_turns(user_id, 5)
+    if not turns:
         return "No memory yet."
-    return "\n".join([f"You: {m['user']}\nMirrorMe: {m['assistant']}" for m in doc["history"][-5:]])
+    return format_turns(turns)
 
 # === 🔍 Memory Summarization ===
 def summarize_user_memory(user_id):
-    doc = get_doc("memories", user_id)
-    if not doc or "history" not in doc:
+    history = get_recent_turns(user_id, 10)
+    if not history:
         return "Nothing to summarize yet."
-    history = doc["history"][-10:]
-    chat = "\n".join([f"You: {m['user']}\nMirrorMe: {m['assistant']}" for m in history])
+    chat = format_turns(history)
     prompt = [
         {"role": "system", "content": "You are a calm, analytical assistant summarizing emotional and behavioral patterns."},
         {"role": "user", "content": f"Summarize this chat history and extract patterns or emotional insights:\n\n{chat}"}
@@ -55,5 +128,5 @@ def load_user_clarity(user_id):
         }
     return doc
 
-def save_user_clarity(user_id, clarity_data):
-    save_doc("clarities", user_id, clarity_data)
+def save_user_clarity(user_id, clarity_data, defer=False):
+    save_doc("clarities", user_id, clarity_data, defer=defer)
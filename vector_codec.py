@@ -0,0 +1,43 @@
+# vector_codec.py
+import os
+import numpy as np
+
+# float32 = legacy array of doubles; float16 / int8 = packed bytes field
+VECTOR_ENCODING = os.getenv("VECTOR_ENCODING", "float16")
+
+
+# === 📦 Encode for Storage ===
+def encode_vector(vector, encoding=VECTOR_ENCODING):
+    """
+    Return the Firestore fields for one embedding in the given encoding.
+    int8 uses symmetric per-vector scalar quantization (scale = max|v| / 127).
+    """
+    vec = np.asarray(vector, dtype=np.float32)
+    if encoding == "float16":
+        return {"vector_bytes": vec.astype("<f2").tobytes(), "encoding": "float16"}
+    if encoding == "int8":
+        scale = float(np.abs(vec).max()) / 127 or 1.0
+        codes = np.clip(np.round(vec / scale), -127, 127).astype(np.int8)
+        return {"vector_bytes": codes.tobytes(), "vector_scale": scale, "encoding": "int8"}
+    return {"vector": vec.tolist()}
+
+
+# === 📤 Decode from Storage ===
+def decode_vector(doc):
+    """
+    Return the stored embedding as a NumPy array, or None if the doc has none.
+    float16 is a zero-copy view over the stored bytes.
+    """
+    encoding = doc.get("encoding")
+    if encoding == "float16":
+        return np.frombuffer(doc["vector_bytes"], dtype="<f2")
+    if encoding == "int8":
+        codes = np.frombuffer(doc["vector_bytes"], dtype=np.int8)
+        return codes.astype(np.float32) * np.float32(doc.get("vector_scale", 1.0))
+    if "vector" in doc:
+        return np.asarray(doc["vector"], dtype=np.float32)
+    return None
+
+
+# Fields a reader needs to decode any encoding
+ENCODED_FIELDS = ["vector", "vector_bytes", "vector_scale", "encoding"]
@@ -0,0 +1,341 @@
+# vector_index.py
+import os
+import threading
+import time
+import numpy as np
+from vector_scoring import normalize_rows, search, quantize_int8, search_int8
+from retrieval_weights import memory_weights, source_weight, to_epoch
+
+# hnswlib is optional — only used once a user's history gets large
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+EMBEDDING_DIM = 1536
+HNSW_THRESHOLD = 5000  # switch to the ANN backend above this many vectors
+# float32 = exact matrix; int8 = int8 codes for the scan + float16 rows for re-ranking
+INDEX_PRECISION = os.getenv("INDEX_PRECISION", "float32")
+# Rows beyond this many (lowest weight first) move to the cold tier
+HOT_INDEX_LIMIT = int(os.getenv("HOT_INDEX_LIMIT", "4000"))
+# The cold tier is searched when the best hot score is below this
+COLD_MISS_SCORE = float(os.getenv("COLD_MISS_SCORE", "0.75"))
+# Seconds a partially loaded index is served before its load is retried
+FAILED_LOAD_RETRY = 30
+WEIGHT_REFRESH_SECONDS = 3600
+
+
+# === 🧮 Per-User Vector Index ===
+class UserVectorIndex:
+    """
+    In-memory index of one user's embeddings.
+    Rows are L2-normalized float32, so cosine similarity is a single
+    matrix-vector product. Large histories use HNSW when hnswlib is installed.
+    With precision="int8" the scan runs over int8 codes and the top candidates
+    are re-ranked against float16 rows. With a storage (LocalVectorFile) the
+    float32 matrix lives in a memory-mapped file instead of RAM.
+
+    Scores are multiplied by a per-row weight (source x recency). With a
+    hot_limit, the lowest-weight rows live in a cold tier that is only
+    searched when the hot tier has no good match.
+    """
+
+    def __init__(self, user_id, dim=EMBEDDING_DIM, precision=INDEX_PRECISION, storage=None, hot_limit=None):
+        self.user_id = user_id
+        self.dim = dim
+        self.storage = storage
+        self.precision = "float32" if storage is not None else precision
+        self.hot_limit = None if storage is not None else hot_limit
+        quantized = self.precision == "int8"
+        self.matrix = np.zeros((0, dim), dtype=np.float16 if quantized else np.float32)
+        self.codes = np.zeros((0, dim), dtype=np.int8) if quantized else None
+        self.scales = np.zeros(0, dtype=np.float32) if quantized else None
+        self.timestamps = np.zeros(0, dtype=np.float64)
+        self.source_weights = np.zeros(0, dtype=np.float32)
+        self.weights = None
+        self.weights_at = 0.0
+        self.size = 0
+        self.ids = []
+        self.texts = []
+        self.sources = []
+        self.positions = {}
+        self.ann = None
+        self.cold = None
+        self.loading = False
+        self.lock = threading.Lock()
+        if storage is not None:
+            self._open_storage()
+
+    def _open_storage(self):
+        self.matrix = self.storage.open()
+        self._grow_columns(self.matrix.shape[0])
+        for row, entry in sorted(self.storage.read_meta().items()):
+            if row != self.size or row >= self.matrix.shape[0]:
+                break  # rows are appended in order; anything past a gap is torn
+            self._set_meta(row, entry["id"], entry.get("text", ""), entry.get("source", "chat"),
+                           entry.get("created_at"), new=True)
+            self.size += 1
+
+    def __len__(self):
+        return self.size + (len(self.cold) if self.cold is not None else 0)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.positions or (self.cold is not None and doc_id in self.cold)
+
+    def documents(self):
+        """Yield (doc_id, text) for every memory in both tiers."""
+        yield from zip(self.ids, self.texts)
+        if self.cold is not None:
+            yield from self.cold.documents()
+
+    # === 📏 Capacity ===
+    def _grow(self, needed):
+        capacity = self.matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 64)
+        if self.storage is not None:
+            self.matrix = self.storage.grow(new_capacity)
+        else:
+            self.matrix = self._resized(self.matrix, new_capacity)
+            if self.codes is not None:
+                self.codes = self._resized(self.codes, new_capacity)
+                self.scales = self._resized(self.scales, new_capacity)
+        self._grow_columns(new_capacity)
+
+    def _grow_columns(self, capacity):
+        if self.timestamps.shape[0] < capacity:
+            self.timestamps = self._resized(self.timestamps, capacity)
+            self.source_weights = self._resized(self.source_weights, capacity)
+
+    def _resized(self, array, capacity):
+        grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:self.size] = array[:self.size]
+        return grown
+
+    # === ✏️ Writes ===
+    def _set_meta(self, row, doc_id, text, source, created_at, new):
+        if new:
+            self.positions[doc_id] = row
+            self.ids.append(doc_id)
+            self.texts.append(text)
+            self.sources.append(source)
+        else:
+            self.texts[row] = text
+            self.sources[row] = source
+        self.timestamps[row] = to_epoch(created_at)
+        self.source_weights[row] = source_weight(source)
+        self.weights = None
+
+    def add(self, doc_id, vector, text, source="chat", created_at=None):
+        """Insert or replace one embedding."""
+        if self.cold is not None and doc_id in self.cold:
+            self.cold.add(doc_id, vector, text, source, created_at)
+            return
+
+        vec = normalize_rows(vector)[0]
+        if not vec.any():
+            return
+
+        with self.lock:
+            row = self.positions.get(doc_id)
+            new = row is None
+            if new:
+                row = self.size
+                self._grow(row + 1)
+            self._set_meta(row, doc_id, text, source, created_at, new)
+            if new:
+                self.size += 1
+            self.matrix[row] = vec
+            if self.storage is not None:
+                self.storage.record(row, doc_id, text, source, created_at)
+
+            if self.codes is not None:
+                codes, scales = quantize_int8(vec)
+                self.codes[row] = codes[0]
+                self.scales[row] = scales[0]
+            elif self.ann is not None:
+                self._ann_add(np.array([row]))
+            elif hnswlib is not None and self.size >= HNSW_THRESHOLD:
+                self._build_ann()
+
+        if self.hot_limit and not self.loading and self.size > self.hot_limit * 1.25:
+            self.split_cold()
+
+    def load(self, docs):
+        """Bulk-load stored vector docs ({id, vector, text, source, created_at})."""
+        self.loading = True
+        try:
+            for doc in docs:
+                if doc.get("vector") is None:
+                    continue
+                self.add(doc["id"], doc["vector"], doc.get("text", ""), doc.get("source", "chat"), doc.get("created_at"))
+        finally:
+            self.loading = False
+        if self.hot_limit and self.size > self.hot_limit:
+            self.split_cold()
+
+    # === ⚖️ Weights & Tiering ===
+    def current_weights(self):
+        """Row weights (source x recency), refreshed hourly or after writes."""
+        if self.weights is None or time.time() - self.weights_at > WEIGHT_REFRESH_SECONDS:
+            self.weights = memory_weights(self.timestamps[:self.size], self.source_weights[:self.size])
+            self.weights_at = time.time()
+        return self.weights
+
+    def split_cold(self):
+        """Keep the hot_limit highest-weight rows hot; move the rest to the cold tier."""
+        with self.lock:
+            if not self.hot_limit or self.size <= self.hot_limit:
+                return
+            weights = self.current_weights()
+            keep = np.sort(np.argpartition(-weights, self.hot_limit - 1)[:self.hot_limit])
+            move = np.setdiff1d(np.arange(self.size), keep)
+
+            if self.cold is None:
+                self.cold = UserVectorIndex(self.user_id, self.dim, self.precision)
+            cold_rows = [
+                (self.ids[r], self.matrix[r].astype(np.float32), self.texts[r], self.sources[r], self.timestamps[r])
+                for r in move
+            ]
+            self._compact(keep)
+
+        for doc_id, vec, text, source, ts in cold_rows:
+            self.cold.add(doc_id, vec, text, source, float(ts))
+
+    def _compact(self, keep):
+        self.matrix = np.ascontiguousarray(self.matrix[keep])
+        if self.codes is not None:
+            self.codes = np.ascontiguousarray(self.codes[keep])
+            self.scales = self.scales[keep]
+        self.timestamps = self.timestamps[keep]
+        self.source_weights = self.source_weights[keep]
+        self.ids = [self.ids[r] for r in keep]
+        self.texts = [self.texts[r] for r in keep]
+        self.sources = [self.sources[r] for r in keep]
+        self.positions = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.size = len(keep)
+        self.weights = None
+        if self.ann is not None:
+            self._build_ann()
+
+    # === 🔍 Search ===
+    def search(self, query_vec, top_n=3):
+        """Return the texts of the top_n best-scoring stored memories."""
+        return [text for _, text, _ in self.search_many([query_vec], top_n)[0]]
+
+    def search_many(self, query_vecs, top_n=3):
+        """
+        Score many queries in one pass. Returns one [(doc_id, text, score)] list
+        per query, best first; the cold tier fills in on a hot-tier miss.
+        """
+        results = []
+        for query_vec, hits in zip(query_vecs, self.search_rows_many(query_vecs, top_n)):
+            hot = [(self.ids[row], self.texts[row], score) for row, score in hits]
+            if self.cold is not None and (len(hot) < top_n or hot[0][2] < COLD_MISS_SCORE):
+                hot = sorted(hot + self.cold.search_many([query_vec], top_n)[0],
+                             key=lambda hit: hit[2], reverse=True)[:top_n]
+            results.append(hot)
+        return results
+
+    def search_rows_many(self, query_vecs, top_n=3):
+        """Hot-tier search; returns one [(row, weighted score)] list per query."""
+        if self.size == 0:
+            return [[] for _ in query_vecs]
+
+        with self.lock:
+            k = min(top_n, self.size)
+            weights = self.current_weights()
+            if self.ann is not None:
+                # Over-fetch, then apply weights to the ANN candidates
+                labels, distances = self.ann.knn_query(normalize_rows(query_vecs), k=min(k * 4, self.size))
+                results = []
+                for row_labels, row_distances in zip(labels, distances):
+                    scored = [(int(row), (1.0 - float(d)) * float(weights[row]))
+                              for row, d in zip(row_labels, row_distances)]
+                    results.append(sorted(scored, key=lambda x: x[1], reverse=True)[:k])
+                return results
+
+            queries = np.asarray(query_vecs, dtype=np.float32)
+            if self.codes is not None:
+                idx, scores = search_int8(
+                    self.codes[:self.size], self.scales[:self.size], queries, k,
+                    rerank_matrix=self.matrix[:self.size], weights=weights
+                )
+            else:
+                idx, scores = search(self.matrix[:self.size], queries, k, weights=weights)
+            return [
+                [(int(row), float(score)) for row, score in zip(row_idx, row_scores)]
+                for row_idx, row_scores in zip(idx, scores)
+            ]
+
+    # === 🕸 Optional HNSW Backend ===
+    def _build_ann(self):
+        self.ann = hnswlib.Index(space="ip", dim=self.dim)
+        self.ann.init_index(max_elements=max(self.size * 2, HNSW_THRESHOLD), ef_construction=200, M=16)
+        self.ann.set_ef(64)
+        self._ann_add(np.arange(self.size))
+
+    def _ann_add(self, rows):
+        needed = self.size
+        if needed > self.ann.get_max_elements():
+            self.ann.resize_index(needed * 2)
+        self.ann.add_items(self.matrix[rows], rows)
+
+
+# === 🗂 Process-Wide Registry ===
+_indexes = {}
+_failed_loads = {}  # user_id -> time of a load that raised part way
+_registry_lock = threading.Lock()
+
+
+def get_user_index(user_id, loader, storage=None, on_loaded=None):
+    """
+    Return the cached index for a user, building it once with loader(user_id),
+    which must return the user's stored vector docs. With a storage, the
+    loader only runs when the local replica is empty. on_loaded() is called
+    once the loader has run to the end (e.g. to mark the replica complete).
+    If the loader fails part way, the partial index is only served for
+    FAILED_LOAD_RETRY seconds; then it (and its replica) is rebuilt.
+    """
+    index = _indexes.get(user_id)
+    if index is not None:
+        failed_at = _failed_loads.get(user_id)
+        if failed_at is None or time.time() - failed_at < FAILED_LOAD_RETRY:
+            return index
+        with _registry_lock:
+            if _indexes.get(user_id) is index:
+                _indexes.pop(user_id)
+                _failed_loads.pop(user_id, None)
+                if storage is not None:
+                    storage.reset()  # its rows are the partial load
+
+    # Load outside the lock so one slow user doesn't block everyone else
+    index = UserVectorIndex(user_id, storage=storage, hot_limit=HOT_INDEX_LIMIT)
+    failed = False
+    if len(index) == 0:
+        try:
+            index.load(loader(user_id))
+            if on_loaded is not None:
+                on_loaded()
+        except Exception as e:
+            print(f"Vector index load for {user_id} failed, retrying in {FAILED_LOAD_RETRY}s: {e}")
+            failed = True
+    with _registry_lock:
+        if user_id in _indexes:
+            return _indexes[user_id]
+        _indexes[user_id] = index
+        if failed:
+            _failed_loads[user_id] = time.time()
+        return index
+
+
+def get_loaded_index(user_id):
+    """Return the user's index if it is already in memory, else None."""
+    return _indexes.get(user_id)
+
+
+def drop_user_index(user_id):
+    with _registry_lock:
+        _indexes.pop(user_id, None)
+        _failed_loads.pop(user_id, None)
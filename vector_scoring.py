@@ -0,0 +1,110 @@
+# vector_scoring.py
+import numpy as np
+
+
+# === 📐 Normalization ===
+def normalize_rows(vectors):
+    """
+    Return vectors as a contiguous float32 array with unit-length rows.
+    Zero rows stay zero so they never score above anything real.
+    """
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# === ⚡ Scoring ===
+def cosine_scores(matrix, queries):
+    """
+    Score pre-normalized rows against one query (dim,) or many (Q, dim).
+    Returns (N,) for a single query and (Q, N) for a batch — one BLAS call either way.
+    """
+    single = np.ndim(queries) == 1
+    scores = normalize_rows(queries) @ matrix.T
+    return scores[0] if single else scores
+
+
+def top_k(scores, k):
+    """
+    Indices of the k highest scores, best first. Works on (N,) or (Q, N);
+    uses argpartition so only the k winners get sorted.
+    """
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        idx = np.broadcast_to(np.arange(n), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=-1), axis=-1)
+    return np.take_along_axis(idx, order, axis=-1)
+
+
+def search(matrix, queries, k, weights=None):
+    """
+    Top-k (indices, scores) for one or many queries against a normalized matrix.
+    weights (N,) multiplies each row's score before ranking.
+    """
+    scores = cosine_scores(matrix, queries)
+    if weights is not None:
+        scores *= weights
+    idx = top_k(scores, k)
+    return idx, np.take_along_axis(scores, idx, axis=-1)
+
+
+# === 🗜 Int8 Quantized Scoring ===
+SCORE_CHUNK = 8192  # rows decoded per block, keeps the float32 scratch small
+
+
+def quantize_int8(matrix):
+    """Per-row symmetric int8 codes and float32 scales for a normalized matrix."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    scales = np.abs(matrix).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.round(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def int8_scores(codes, scales, queries):
+    """Approximate cosine scores (Q, N) straight from int8 codes."""
+    q = normalize_rows(queries)
+    n = codes.shape[0]
+    scores = np.empty((q.shape[0], n), dtype=np.float32)
+    for start in range(0, n, SCORE_CHUNK):
+        end = min(start + SCORE_CHUNK, n)
+        block = codes[start:end].astype(np.float32)
+        scores[:, start:end] = (q @ block.T) * scales[start:end]
+    return scores
+
+
+def search_int8(codes, scales, queries, k, rerank_matrix=None, oversample=4, weights=None):
+    """
+    Top-k on the int8 codes. With rerank_matrix (any float dtype, same row order),
+    the best k * oversample candidates are re-scored at full precision.
+    """
+    single = np.ndim(queries) == 1
+    coarse = int8_scores(codes, scales, queries)
+    if weights is not None:
+        coarse *= weights
+
+    if rerank_matrix is None:
+        idx = top_k(coarse, k)
+        scores = np.take_along_axis(coarse, idx, axis=-1)
+    else:
+        candidates = top_k(coarse, k * oversample)
+        q = normalize_rows(queries)
+        rows = rerank_matrix[candidates].astype(np.float32)
+        exact = np.einsum("qcd,qd->qc", rows, q) / np.maximum(np.linalg.norm(rows, axis=-1), 1e-12)
+        if weights is not None:
+            exact *= weights[candidates]
+        order = top_k(exact, k)
+        idx = np.take_along_axis(candidates, order, axis=-1)
+        scores = np.take_along_axis(exact, order, axis=-1)
+
+    return (idx[0], scores[0]) if single else (idx, scores)
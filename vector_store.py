@@ -1,58 +1,265 @@
 # vector_store.py
 import openai
 import hashlib
-from firebase_client import save_doc, get_doc, get_all_docs
+import glob
+import itertools
+from datetime import datetime
+from firebase_client import get_doc, save_doc, save_docs, iter_docs
+from vector_index import get_user_index, get_loaded_index, drop_user_index, EMBEDDING_DIM
+from local_vector_store import LocalVectorFile
+from lexical_index import (
+    get_user_lexical_index, get_loaded_lexical_index, drop_user_lexical_index,
+    reciprocal_rank_fusion, tokenize
+)
+from embedding_cache import embedding_cache
+from vector_codec import encode_vector, decode_vector, ENCODED_FIELDS
 from dotenv import load_dotenv
 import os
-import numpy as np
 
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+# "firestore" = in-memory index loaded from Firestore;
+# "local" = memory-mapped replica in user_data/{uid}/ (Firestore still gets every write)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "firestore")
+
+# Answer from BM25 alone when its best hit covers this share of the query terms,
+# the query has at least LEXICAL_MIN_TERMS terms, and the best hit's score is
+# LEXICAL_MARGIN times the runner-up's (a short query on a common word matches
+# everything equally well, so coverage alone says little)
+LEXICAL_CONFIDENCE = float(os.getenv("LEXICAL_CONFIDENCE", "0.8"))
+LEXICAL_MIN_TERMS = 3
+LEXICAL_MARGIN = float(os.getenv("LEXICAL_MARGIN", "1.5"))
+QUERY_EMBED_TIMEOUT = float(os.getenv("QUERY_EMBED_TIMEOUT", "4"))
+
 # === Utility: Create a hash ID for text ===
 def hash_text(text):
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_BATCH_SIZE = 100  # inputs per embeddings request
+
+# === Embed text, checking the local cache first ===
+def embed_text(text, timeout=None):
+    key = hash_text(text)
+    cached = embedding_cache.get(EMBEDDING_MODEL, key)
+    if cached is not None:
+        return cached.tolist()
+
+    embedding = openai.embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=text,
+        timeout=timeout
+    ).data[0].embedding
+    embedding_cache.put(EMBEDDING_MODEL, key, embedding)
+    return embedding
+
+# === Embed many texts with as few requests as possible ===
+def embed_texts(texts):
+    keys = [hash_text(t) for t in texts]
+    embeddings = {}
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key in embeddings or key in missing:
+            continue
+        cached = embedding_cache.get(EMBEDDING_MODEL, key)
+        if cached is not None:
+            embeddings[key] = cached.tolist()
+        else:
+            missing[key] = text
+
+    missing = list(missing.items())
+
+    for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+        chunk = missing[start:start + EMBEDDING_BATCH_SIZE]
+        response = openai.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=[text for _, text in chunk]
+        )
+        for (key, _), item in zip(chunk, sorted(response.data, key=lambda d: d.index)):
+            embedding_cache.put(EMBEDDING_MODEL, key, item.embedding)
+            embeddings[key] = item.embedding
+
+    return [embeddings[key] for key in keys]
+
+# === Per-user vector collection: users/{uid}/vectors/{hash} ===
+def user_vector_collection(user_id):
+    return f"users/{user_id}/vectors"
+
+VECTOR_FIELDS = ENCODED_FIELDS + ["text", "source", "created_at"]
+
 # === Store vector ===
 def store_vector(user_id, text, source="chat"):
     try:
-        embedding = openai.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        ).data[0].embedding
+        embedding = embed_text(text)
 
         vector_id = hash_text(text)
-        save_doc("vectors", f"{user_id}_{vector_id}", {
+        created_at = datetime.utcnow().isoformat()
+        save_doc(user_vector_collection(user_id), vector_id, {
             "user_id": user_id,
-            "vector": embedding,
+            **encode_vector(embedding),
             "text": text,
-            "source": source
+            "source": source,
+            "created_at": created_at
         })
+
+        # Keep the index (and local replica) in sync instead of reloading it
+        index = _index_for_write(user_id)
+        if index is not None:
+            index.add(vector_id, embedding, text, source, created_at)
+        lexical = get_loaded_lexical_index(user_id)
+        if lexical is not None:
+            lexical.add(vector_id, text)
     except Exception as e:
         print("Embedding store error:", e)
 
+# === Store many vectors (backfills, imports) ===
+def store_vectors(user_id, texts, source="chat"):
+    """
+    Bulk version of store_vector: dedupes by text hash, embeds in chunks and
+    writes with batched commits. Returns the number of vectors written.
+    """
+    try:
+        index = _index_for_write(user_id)
+        unique = {}
+        for text in texts:
+            if not text or not text.strip():
+                continue
+            vector_id = hash_text(text)
+            if vector_id in unique or (index is not None and vector_id in index):
+                continue
+            unique[vector_id] = text
+        if not unique:
+            return 0
+
+        embeddings = embed_texts(list(unique.values()))
+        created_at = datetime.utcnow().isoformat()
+        docs = {
+            vector_id: {
+                "user_id": user_id, **encode_vector(embedding),
+                "text": text, "source": source, "created_at": created_at
+            }
+            for (vector_id, text), embedding in zip(unique.items(), embeddings)
+        }
+        if not save_docs(user_vector_collection(user_id), docs):
+            return 0
+        bump_index_generation(user_id)  # other processes' indexes and replicas miss these rows
+
+        if index is not None:
+            for (vector_id, text), embedding in zip(unique.items(), embeddings):
+                index.add(vector_id, embedding, text, source, created_at)
+        lexical = get_loaded_lexical_index(user_id)
+        if lexical is not None:
+            for vector_id, text in unique.items():
+                lexical.add(vector_id, text)
+        return len(docs)
+    except Exception as e:
+        print("Bulk embedding store error:", e)
+        return 0
+
+# === Load a user's stored vectors (used once per process by the index) ===
+def load_user_vectors(user_id):
+    """
+    Yield the user's decoded vector docs, paging through Firestore so only
+    one page of raw (encoded) docs is held while the index fills.
+    """
+    # Docs not yet moved by scripts/migrate_vectors.py live in the flat collection
+    legacy = iter_docs("vectors", where=[("user_id", "==", user_id)], select=VECTOR_FIELDS)
+    docs = iter_docs(user_vector_collection(user_id), select=VECTOR_FIELDS, include_id=True)
+    for v in itertools.chain(({**v, "id": hash_text(v.get("text", ""))} for v in legacy), docs):
+        yield {
+            "id": v["id"], "vector": decode_vector(v), "text": v.get("text", ""),
+            "source": v.get("source", "chat"), "created_at": v.get("created_at")
+        }
+
+# === Index generations (bumped when vectors are rewritten offline) ===
+# memory_compaction, store_vectors (backfills) and migrate_vectors write a
+# user's vectors outside the app's write path; they bump the user's
+# generation here and every app process rebuilds its indexes (and its local
+# replica) once it sees the new value. get_doc caches it briefly.
+INDEX_GENERATIONS = "vector_index_generations"
+_index_generations = {}  # user_id -> generation the loaded in-memory index came from
+
+def index_generation(user_id):
+    return (get_doc(INDEX_GENERATIONS, user_id) or {}).get("generation", 0)
+
+def bump_index_generation(user_id):
+    generation = index_generation(user_id) + 1
+    save_doc(INDEX_GENERATIONS, user_id, {"generation": generation, "updated_at": datetime.utcnow().isoformat()})
+    return generation
+
+# === Pick the index for the configured backend ===
+def open_user_index(user_id):
+    generation = index_generation(user_id)
+    if _index_generations.get(user_id, generation) != generation:
+        drop_user_index(user_id)
+        drop_user_lexical_index(user_id)
+    if VECTOR_BACKEND == "local":
+        storage = LocalVectorFile(user_id, EMBEDDING_DIM)
+        # The replica's generation file is only written once a load from
+        # Firestore has finished, so a missing or older one means the rows on
+        # disk are partial (crash, failed load) or predate a bulk rewrite
+        if get_loaded_index(user_id) is None and storage.read_generation() != generation:
+            storage.reset()
+        index = get_user_index(user_id, load_user_vectors, storage=storage,
+                               on_loaded=lambda: storage.write_generation(generation))
+    else:
+        index = get_user_index(user_id, load_user_vectors)
+    _index_generations[user_id] = generation
+    return index
+
+def _index_for_write(user_id):
+    # The local replica must see every write; the in-memory index only if it's loaded
+    if VECTOR_BACKEND == "local":
+        return open_user_index(user_id)
+    return get_loaded_index(user_id)
+
+# === Lexical docs: stored memory texts plus local journal files ===
+def load_lexical_docs(user_id):
+    index = open_user_index(user_id)
+    docs = [(doc_id, text) for doc_id, text in index.documents() if text]
+    for path in sorted(glob.glob(f"user_journals/{user_id}/*.txt")):
+        with open(path, "r") as f:
+            text = f.read()
+        docs.append((hash_text(text), text))
+    return docs
+
 # === Retrieve similar vectors ===
+def lexical_is_confident(query_text, lexical_hits, top_n):
+    """True when the BM25 ranking is clear enough to skip the embedding call."""
+    if len(lexical_hits) < top_n or len(set(tokenize(query_text))) < LEXICAL_MIN_TERMS:
+        return False
+    best, runner_up = lexical_hits[0][1], lexical_hits[1][1] if len(lexical_hits) > 1 else 0.0
+    return lexical_hits[0][2] >= LEXICAL_CONFIDENCE and best >= LEXICAL_MARGIN * runner_up
+
 def get_similar_memories(user_id, query_text, top_n=3):
+    """
+    Hybrid retrieval: BM25 answers alone when its best hit covers most of a
+    multi-term query and clearly outscores the rest, otherwise BM25 and
+    vector rankings are fused. If the embedding call fails or times out,
+    the lexical ranking is returned.
+    """
     try:
-        query_vec = openai.embeddings.create(
-            model="text-embedding-ada-002",
-            input=query_text
-        ).data[0].embedding
-
-        all_vectors = get_all_docs("vectors")
-        user_vectors = [v for v in all_vectors if v.get("user_id") == user_id]
+        lexical = get_user_lexical_index(user_id, load_lexical_docs)
+        lexical_hits = lexical.search(query_text, top_n * 3)
+        if lexical_is_confident(query_text, lexical_hits, top_n):
+            return [lexical.texts[doc_id] for doc_id, _, _ in lexical_hits[:top_n]]
 
-        def cosine_sim(a, b):
-            a, b = np.array(a), np.array(b)
-            return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+        lexical_ranking = [doc_id for doc_id, _, _ in lexical_hits]
+        try:
+            query_vec = embed_text(query_text, timeout=QUERY_EMBED_TIMEOUT)
+        except Exception as e:
+            print("Query embedding failed, using lexical results:", e)
+            return [lexical.texts[doc_id] for doc_id in lexical_ranking[:top_n]]
 
-        scored = [
-            (v["text"], cosine_sim(query_vec, v["vector"]))
-            for v in user_vectors if "vector" in v
-        ]
+        index = open_user_index(user_id)
+        vector_hits = index.search_many([query_vec], top_n * 3)[0]
+        if not lexical_ranking:
+            return [text for _, text, _ in vector_hits[:top_n]]
 
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [s[0] for s in scored[:top_n]]
+        vector_texts = {doc_id: text for doc_id, text, _ in vector_hits}
+        fused = reciprocal_rank_fusion([list(vector_texts), lexical_ranking])[:top_n]
+        return [lexical.texts.get(doc_id) or vector_texts[doc_id] for doc_id in fused]
 
     except Exception as e:
         print("Similarity retrieval error:", e)
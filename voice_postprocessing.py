@@ -1,13 +1,18 @@
 import random
 import time
 import numpy as np
+from mood_engine import detect_mood, normalize_mood
 
-def post_process_text(text, mood="neutral", traits=None):
+def post_process_text(text, mood=None, traits=None):
     """
     Adjusts text output to sound more natural, conversational, and human.
     Includes filler words, emotional variation, and pacing markers.
+    Without a mood, it is detected from the text.
     """
     traits = traits or {}
+    # "empathetic" isn't one of mood_engine's moods, so check it before normalizing
+    empathetic = (mood or "").strip().lower() == "empathetic"
+    mood = normalize_mood(mood) if mood else detect_mood(text)
 
     # Tone-based fillers
     soft_fillers = ["Hmm...", "You know,", "Honestly,", "Well,", "Let me think...", "Right,"]
@@ -19,7 +24,7 @@ def post_process_text(text, mood="neutral", traits=None):
         text = f"{random.choice(excited_fillers)} {text}"
     elif mood == "sad":
         text = f"{random.choice(soft_fillers)} {text.lower()}"
-    elif mood == "empathetic" or traits.get("Empathy", 0) > 70:
+    elif empathetic or traits.get("Empathy", 0) > 70:
         text = f"{random.choice(empathetic_starters)} {text}"
     elif traits.get("Humor", 0) > 70:
         if random.random() > 0.5:
@@ -36,6 +41,7 @@ def get_voice_settings(mood):
     """
     Returns voice settings based on mood for ElevenLabs API
     """
+    mood = normalize_mood(mood)
     settings = {
         "stability": 0.4,
         "similarity_boost": 0.8